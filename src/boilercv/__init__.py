@@ -5,22 +5,51 @@ from os import environ
 from pathlib import Path
 from typing import Any
 
-from cv2 import version
-from loguru import logger
-from pandas import set_option
-
 PROJECT_PATH = Path()
 """Path to the project root, where `params.yaml` will go."""
 
 _debug = environ.get("BOILERCV_DEBUG")
 _preview = environ.get("BOILERCV_PREVIEW")
 _write = environ.get("BOILERCV_WRITE")
+_workers = environ.get("BOILERCV_WORKERS")
+_shard_size = environ.get("BOILERCV_SHARD_SIZE")
+_prefetch = environ.get("BOILERCV_PREFETCH")
+_cache_bytes = environ.get("BOILERCV_CACHE_BYTES")
+_cache_spill = environ.get("BOILERCV_CACHE_SPILL")
+_cache_spill_bytes = environ.get("BOILERCV_CACHE_SPILL_BYTES")
+_encoding = environ.get("BOILERCV_ENCODING")
+_decode_cache = environ.get("BOILERCV_DECODE_CACHE")
+_decode_cache_bytes = environ.get("BOILERCV_DECODE_CACHE_BYTES")
+_contour_store = environ.get("BOILERCV_CONTOUR_STORE")
+_instrument = environ.get("BOILERCV_INSTRUMENT")
 DEBUG = str(_debug).casefold() == "true" if _debug else False
 """Whether to run in debug mode. Log to `boilercv.log`."""
 PREVIEW = str(_preview).casefold() == "true" if _preview else False
 """Whether to run interactive previews."""
 WRITE = str(_write).casefold() == "true" if _write else False
 """Whether to write to the local media folder."""
+WORKERS = int(_workers) if _workers else None
+"""Number of worker processes for per-video stages. Default: number of processors."""
+SHARD_SIZE = int(_shard_size) if _shard_size else 1000
+"""Number of frames in each shard of a video split across worker processes."""
+PREFETCH = int(_prefetch) if _prefetch else 1
+"""Number of items to read ahead, and results to hold for writing, in pipelines."""
+CACHE_BYTES = int(_cache_bytes) if _cache_bytes else 2**28
+"""Byte budget for caching unpacked frames in each process using it. Default: 256 MiB."""
+CACHE_SPILL = Path(_cache_spill) if _cache_spill else None
+"""Directory to spill unpacked frames evicted from the cache to. Default: no spill."""
+CACHE_SPILL_BYTES = int(_cache_spill_bytes) if _cache_spill_bytes else 2**33
+"""Byte budget for spilled unpacked frames. Default: 8 GiB."""
+ENCODING = _encoding or "zlib"
+"""Name of the encoding policy for processed videos. See `boilercv.data.encodings`."""
+DECODE_CACHE_MODE = _decode_cache or "uncompressed"
+"""How decoded copies of compressed data are written: "uncompressed", "fast", or "off"."""
+DECODE_CACHE_BYTES = int(_decode_cache_bytes) if _decode_cache_bytes else 2**35
+"""Byte budget for each directory of decoded copies. Default: 32 GiB."""
+CONTOUR_STORE = _contour_store or "hdf"
+"""Name of the storage backend for contours. See `boilercv.data.contours`."""
+INSTRUMENT = str(_instrument).casefold() != "false" if _instrument else True
+"""Whether to measure stages and write reports of them. See `boilercv.instrument`."""
 
 FFMPEG_LOG_LEVEL = "warn" if DEBUG else "error"
 """Log level for FFMPEG."""
@@ -33,8 +62,19 @@ FRAMERATE_PREV = 3
 def init():
     """Initialize `boilercv`."""
     if DEBUG:
+        from loguru import logger  # noqa: PLC0415
+
         logger.add(sink="boilercv.log")
-    check_contrib()
+
+
+def set_pandas_options():
+    """Set `pandas` options.
+
+    Called by modules using `pandas` rather than here, as `pandas` is slow to import and
+    not every stage needs it.
+    """
+    from pandas import set_option  # noqa: PLC0415
+
     set_option("mode.copy_on_write", True)
     set_option("mode.chained_assignment", "raise")
     set_option("mode.string_storage", "pyarrow")
@@ -51,8 +91,11 @@ def check_contrib():
 
     Dependencies can specify a different version of OpenCV than the one required in this
     project, unintentionally clobbering the installed version of OpenCV. Detect whether
-    a non-`contrib` version is installed by a dependency.
+    a non-`contrib` version is installed by a dependency. Called by modules using OpenCV
+    rather than here, as OpenCV is slow to import and not every stage needs it.
     """
+    from cv2 import version  # noqa: PLC0415
+
     if not version.contrib:
         raise ImportError(_CONTRIB_MSG)
 
@@ -64,6 +107,8 @@ def run_example(func: Callable[..., Any], preview: bool = False) -> tuple[str, A
         func: The example function to run.
         preview: Preview results from the function. Default: False.
     """
+    from loguru import logger  # noqa: PLC0415
+
     module_name = func.__module__
     logger.info(f'Running example "{module_name}"')
     result = func(preview=preview)
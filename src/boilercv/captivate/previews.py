@@ -6,7 +6,7 @@ from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Literal, TypeAlias
 
-from numpy import array, ceil, fliplr, issubdtype, ndarray, ones, sqrt
+from numpy import array, ceil, fliplr, issubdtype, ndarray, ones, pad, sqrt
 from pandas import DataFrame
 from pyqtgraph import (
     GraphicsLayoutWidget,
@@ -204,8 +204,7 @@ def pad_images(images: MultipleViewable) -> MutableViewable:  # type: ignore  #
         (shapes[["height", "width"]].max() - shapes[["height", "width"]]) // 2
     ).set_axis(axis="columns", labels=["hpad", "wpad"])
     for i, image in enumerate(images):
-        pad: tuple[int, int] = pads.loc[image.shape[:2], :]  # type: ignore  # pyright 1.1.333
-        hpad, wpad = pad
+        hpad, wpad = pads.loc[image.shape[:2], :]  # type: ignore  # pyright 1.1.333
         zero_pad_for_additional_dims = ((0, 0),) * (image.ndim - 2)
         pad_width = ((hpad, hpad), (wpad, wpad), *zero_pad_for_additional_dims)
         images[i] = pad(image, pad_width)  # type: ignore  # pyright 1.1.333
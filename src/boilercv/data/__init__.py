@@ -23,6 +23,8 @@ TIMEZONE = timezone("US/Pacific")
 
 FRAME = "frame"
 """Frame dimension name."""
+ALL_FRAMES = slice(None)
+"""Slice that gets all frames."""
 TIME = "time"
 """Time dimension name."""
 UTC_TIME = "utc"
@@ -0,0 +1,284 @@
+"""Caches of unpacked frames and of decoded copies of compressed files."""
+
+import json
+import pickle
+from atexit import register
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from hashlib import file_digest, sha256
+from multiprocessing import parent_process
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import RLock
+from typing import Any, Literal, TypeAlias, cast, get_args
+
+from boilercv import (
+    CACHE_BYTES,
+    CACHE_SPILL,
+    CACHE_SPILL_BYTES,
+    DECODE_CACHE_BYTES,
+    DECODE_CACHE_MODE,
+)
+
+CacheKey: TypeAlias = tuple[Hashable, ...]
+"""Key for a cached block, e.g. video name, stage, and frame range."""
+DecodeMode: TypeAlias = Literal["uncompressed", "fast", "off"]
+"""How decoded copies are written. Uncompressed, with a fast codec, or not at all."""
+Writer: TypeAlias = Callable[[Path, Path, DecodeMode], None]
+"""Writes a decoded copy of a source to a destination, given the decode mode."""
+
+
+class FrameCache:
+    """Least-recently-used cache of unpacked frame blocks with a byte budget.
+
+    Blocks are any objects with an `nbytes` attribute, such as arrays and data arrays.
+    When the total size of cached blocks exceeds the budget, the least-recently-used
+    blocks are evicted. If a spill directory is given, evicted blocks are written there
+    instead of being discarded, and are promoted back into memory on their next use.
+    The spill directory has its own byte budget and least-recently-used eviction.
+    Blocks larger than the in-memory budget are never cached.
+
+    Spilled blocks are found again by other processes, as blocks already in the spill
+    directory are indexed, oldest first and sized as on disk, when the cache is made.
+    Call `flush` to spill the blocks held in memory, as is done for `FRAME_CACHE` on
+    exit.
+
+    Args:
+        max_bytes: Byte budget for blocks held in memory. Zero disables the cache.
+        spill: Directory to spill evicted blocks to. Blocks aren't spilled if unset.
+        max_spill_bytes: Byte budget for spilled blocks.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = CACHE_BYTES,
+        spill: Path | None = CACHE_SPILL,
+        max_spill_bytes: int = CACHE_SPILL_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        """Byte budget for blocks held in memory."""
+        self.spill = spill
+        """Directory to spill evicted blocks to."""
+        self.max_spill_bytes = max_spill_bytes
+        """Byte budget for spilled blocks."""
+        self.nbytes = 0
+        """Total size of blocks held in memory."""
+        self.spill_nbytes = 0
+        """Total size of spilled blocks."""
+        self._blocks: OrderedDict[CacheKey, Any] = OrderedDict()
+        self._spilled: OrderedDict[str, tuple[Path, int]] = OrderedDict()
+        self._lock = RLock()
+        if self.spill and self.spill.exists():
+            stats = {path: path.stat() for path in self.spill.glob("*.pkl")}
+            for path, stat in sorted(stats.items(), key=lambda s: s[1].st_mtime_ns):
+                self._spilled[path.stem] = (path, stat.st_size)
+                self.spill_nbytes += stat.st_size
+
+    def __contains__(self, key: CacheKey) -> bool:
+        return key in self._blocks or get_digest(key) in self._spilled
+
+    def get(self, key: CacheKey) -> Any | None:
+        """Get a block, marking it as recently used. Return `None` if not cached."""
+        with self._lock:
+            if key in self._blocks:
+                self._blocks.move_to_end(key)
+                return self._blocks[key]
+            if (digest := get_digest(key)) not in self._spilled:
+                return None
+            path, nbytes = self._spilled.pop(digest)
+            self.spill_nbytes -= nbytes
+            try:
+                block = pickle.loads(path.read_bytes())
+            except FileNotFoundError:
+                return None
+            finally:
+                path.unlink(missing_ok=True)
+            self.put(key, block)
+            return block
+
+    def put(self, key: CacheKey, block: Any):
+        """Cache a block, evicting least-recently-used blocks to stay within budget."""
+        nbytes = block.nbytes
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._blocks:
+                self.nbytes -= self._blocks.pop(key).nbytes
+            self._blocks[key] = block
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                evicted_key, evicted = self._blocks.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+                self._spill(evicted_key, evicted)
+
+    def flush(self):
+        """Spill all blocks held in memory, if there is a spill directory."""
+        with self._lock:
+            while self._blocks:
+                key, block = self._blocks.popitem(last=False)
+                self.nbytes -= block.nbytes
+                self._spill(key, block)
+
+    def clear(self):
+        """Remove all blocks from memory and from the spill directory."""
+        with self._lock:
+            self._blocks.clear()
+            self.nbytes = 0
+            for path, _ in self._spilled.values():
+                path.unlink(missing_ok=True)
+            self._spilled.clear()
+            self.spill_nbytes = 0
+
+    def _spill(self, key: CacheKey, block: Any):
+        """Write an evicted block to the spill directory, if there is one."""
+        nbytes = block.nbytes
+        if not self.spill or nbytes > self.max_spill_bytes:
+            return
+        self.spill.mkdir(parents=True, exist_ok=True)
+        digest = get_digest(key)
+        path = self.spill / f"{digest}.pkl"
+        # Other processes may be reading the spill directory
+        with NamedTemporaryFile(dir=self.spill, suffix=".tmp", delete=False) as file:
+            pickle.dump(block, file, protocol=pickle.HIGHEST_PROTOCOL)
+        Path(file.name).replace(path)
+        if digest in self._spilled:
+            self.spill_nbytes -= self._spilled.pop(digest)[1]
+        self._spilled[digest] = (path, nbytes)
+        self.spill_nbytes += nbytes
+        while self.spill_nbytes > self.max_spill_bytes:
+            _, (evicted_path, evicted_nbytes) = self._spilled.popitem(last=False)
+            evicted_path.unlink(missing_ok=True)
+            self.spill_nbytes -= evicted_nbytes
+
+
+def get_digest(key: CacheKey) -> str:
+    """Get a digest of a cache key, naming its block in the spill directory."""
+    return sha256(repr(key).encode()).hexdigest()
+
+
+FRAME_CACHE = FrameCache()
+"""Process-wide cache of unpacked frame blocks."""
+register(FRAME_CACHE.flush)
+
+
+class DecodeCache:
+    """Decoded copies of compressed files on disk, for faster repeated reads.
+
+    A decoded copy is written next to a sidecar recording the size, modification time,
+    and checksum of its source. Copies are rewritten when their source changes, and the
+    checksum is only recomputed if the size or modification time of the source differs.
+    Each directory of copies has its own byte budget, and the least-recently-used copies
+    are removed to stay within it. Worker processes leave removal to the main process,
+    as they could remove copies that other workers are reading.
+
+    Args:
+        mode: How decoded copies are written. If "off", sources are read directly.
+        max_bytes: Byte budget for the copies in each directory.
+    """
+
+    def __init__(
+        self, mode: str = DECODE_CACHE_MODE, max_bytes: int = DECODE_CACHE_BYTES
+    ):
+        if mode not in get_args(DecodeMode):
+            raise ValueError(f"Unknown decode mode: {mode}")
+        self.mode = cast(DecodeMode, mode)
+        """How decoded copies are written."""
+        self.max_bytes = max_bytes
+        """Byte budget for the copies in each directory."""
+
+    def get(self, source: Path, destination: Path, write: Writer) -> Path:
+        """Get the path to read a source from, writing its decoded copy if needed.
+
+        Args:
+            source: Compressed source file.
+            destination: Path of the decoded copy.
+            write: Writes the decoded copy.
+
+        Returns:
+            The decoded copy, or the source itself if decoded copies are turned off or
+            the source is its own destination.
+        """
+        if self.mode == "off" or source == destination:
+            return source
+        sidecar = get_sidecar(destination)
+        if destination.exists() and self.is_current(source, sidecar):
+            sidecar.touch()
+            return destination
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(
+            dir=destination.parent, suffix=destination.suffix, delete=False
+        ) as file:
+            tmp = Path(file.name)
+        try:
+            write(source, tmp, self.mode)
+            tmp.replace(destination)
+        finally:
+            tmp.unlink(missing_ok=True)
+        write_stamp(sidecar, {**get_stamp(source, checksum=True), "mode": self.mode})
+        if parent_process() is None:
+            self.evict(destination.parent, keep=destination)
+        return destination
+
+    def is_current(self, source: Path, sidecar: Path) -> bool:
+        """Check whether the decoded copy with this sidecar matches its source."""
+        try:
+            stamp = json.loads(sidecar.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return False
+        if stamp.get("mode") != self.mode:
+            return False
+        current = get_stamp(source)
+        if all(stamp.get(k) == v for k, v in current.items()):
+            return True
+        current["sha256"] = get_checksum(source)
+        if stamp.get("sha256") != current["sha256"]:
+            return False
+        write_stamp(sidecar, {**stamp, **current})
+        return True
+
+    def evict(self, directory: Path, keep: Path | None = None):
+        """Remove least-recently-used copies in a directory until within budget.
+
+        Only call this while no other processes are reading copies in the directory.
+        """
+        copies: list[tuple[int, Path, Path]] = []
+        for sidecar in directory.glob("*.json"):
+            copy = sidecar.with_suffix("")
+            if copy.exists():
+                copies.append((sidecar.stat().st_mtime_ns, copy, sidecar))
+        nbytes = sum(copy.stat().st_size for _, copy, _ in copies)
+        for _, copy, sidecar in sorted(copies):
+            if nbytes <= self.max_bytes:
+                break
+            if copy == keep:
+                continue
+            nbytes -= copy.stat().st_size
+            copy.unlink(missing_ok=True)
+            sidecar.unlink(missing_ok=True)
+
+
+def get_sidecar(path: Path) -> Path:
+    """Get the sidecar recording the source of a decoded copy."""
+    return path.with_name(f"{path.name}.json")
+
+
+def get_stamp(source: Path, checksum: bool = False) -> dict[str, Any]:
+    """Get the size and modification time of a source, and optionally its checksum."""
+    stat = source.stat()
+    stamp: dict[str, Any] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    return {**stamp, "sha256": get_checksum(source)} if checksum else stamp
+
+
+def get_checksum(source: Path) -> str:
+    """Get the checksum of a source."""
+    with source.open("rb") as file:
+        return file_digest(file, "sha256").hexdigest()
+
+
+def write_stamp(sidecar: Path, stamp: dict[str, Any]):
+    """Write a stamp to a sidecar."""
+    sidecar.write_text(json.dumps(stamp), encoding="utf-8")
+
+
+DECODE_CACHE = DecodeCache()
+"""Decoded copies of compressed videos and contours."""
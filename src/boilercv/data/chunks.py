@@ -0,0 +1,96 @@
+"""Chunked reading and writing of video datasets."""
+
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from netCDF4 import Dataset
+from numpy import maximum, uint8
+from numpy.typing import DTypeLike
+from xarray.backends.locks import HDF5_LOCK
+
+from boilercv.data import FRAME, VIDEO
+from boilercv.data.encodings import DEFAULT_ENCODING, Encoding
+from boilercv.data.pipeline import prefetch
+from boilercv.types import DA, DS, Vid
+
+CHUNK_SIZE = 500
+"""Default number of frames to hold in memory at once."""
+
+
+def get_chunks(num_frames: int, chunk_size: int = CHUNK_SIZE) -> Iterator[slice]:
+    """Get slices covering all frames, each spanning at most `chunk_size` frames."""
+    for start in range(0, num_frames, chunk_size):
+        yield slice(start, min(start + chunk_size, num_frames))
+
+
+def get_chunked_max(video: DA, chunk_size: int = CHUNK_SIZE) -> DA:
+    """Get the maximum along frames, reading the next chunk of frames in the background."""
+    result: DA | None = None
+    for _, frames in prefetch(
+        partial(read_frames, video), get_chunks(video.sizes[FRAME], chunk_size)
+    ):
+        chunk_max = frames.max(FRAME)
+        result = chunk_max if result is None else maximum(result, chunk_max)
+    if result is None:
+        raise ValueError("Can't get the maximum of a video with no frames.")
+    return result
+
+
+def read_frames(video: DA, frames: slice) -> DA:
+    """Read a slice of frames of a video into memory."""
+    return video.isel({FRAME: frames}).load()
+
+
+def write_frames(video: Any, frames: slice, images: Vid):
+    """Write images to a slice of frames of a video from `stream_video`.
+
+    Holds the lock that `xarray` holds while reading, so it can be written in the
+    background while `xarray` reads in other threads.
+    """
+    with HDF5_LOCK:
+        video[frames] = images
+
+
+@contextmanager
+def stream_video(
+    path: Path,
+    ds: DS,
+    dims: Sequence[str],
+    shape: Sequence[int],
+    dtype: DTypeLike = uint8,
+    attrs: Mapping[str, Any] | None = None,
+    encoding: Encoding = DEFAULT_ENCODING,
+) -> Iterator[Any]:
+    """Write a dataset, yielding its video variable to stream frames into.
+
+    The dataset is written without its video, which is instead created on disk with
+    the given dimensions, shape, and encoding policy. Assign to slices of the
+    yielded variable to write frames without holding the full video in memory. The
+    partially-written file is removed if an exception is raised.
+
+    Args:
+        path: Destination path.
+        ds: Dataset with the coordinates and other variables to write.
+        dims: Dimensions of the video.
+        shape: Shape of the video.
+        dtype: Data type of the video.
+        attrs: Attributes of the video.
+        encoding: Encoding policy for the video.
+    """
+    ds.drop_vars(VIDEO, errors="ignore").to_netcdf(path=path)
+    try:
+        with Dataset(path, "a") as file:
+            for dim, size in zip(dims, shape, strict=True):
+                if dim not in file.dimensions:
+                    file.createDimension(dim, size)
+            video = file.createVariable(
+                VIDEO, dtype, tuple(dims), **encoding.get(shape)
+            )
+            video.setncatts(dict(attrs or {}))
+            yield video
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,130 @@
+"""Storage backends for contour tables."""
+
+from itertools import pairwise
+from pathlib import Path
+from typing import Protocol
+
+from numpy import arange, searchsorted
+from pandas import IndexSlice, read_hdf
+from pyarrow import Table
+from pyarrow.parquet import ParquetWriter, read_table
+from xarray.backends.locks import HDF5_LOCK
+
+from boilercv import CONTOUR_STORE
+from boilercv.data import ALL_FRAMES
+from boilercv.data.cache import DECODE_CACHE, DecodeMode
+from boilercv.models.params import PARAMS
+from boilercv.types import DF
+
+INDEX = ["frame", "contour"]
+"""Index of contour tables."""
+
+
+class ContourStore(Protocol):
+    """Storage backend for contour tables."""
+
+    ext: str
+    """File extension of stored contour tables."""
+
+    def write(self, df: DF, path: Path):
+        """Write a contour table."""
+        ...
+
+    def read(self, path: Path, frames: slice = ALL_FRAMES) -> DF:
+        """Read contours in a slice of frames, selected by label as in `DataFrame.loc`."""
+        ...
+
+
+class HdfContourStore:
+    """Contour tables in compressed HDF5 files.
+
+    The whole table is read regardless of the frames requested. Reads go through the
+    decoded copy in `DECODE_CACHE`, if enabled. Reads and writes hold the lock that
+    `xarray` holds on HDF5 files, so they're safe in pipelines.
+    """
+
+    ext = "h5"
+
+    def write(self, df: DF, path: Path):
+        """Write a contour table."""
+        with HDF5_LOCK:
+            df.to_hdf(path, key="contours", complib="zlib", complevel=9)
+
+    def read(self, path: Path, frames: slice = ALL_FRAMES) -> DF:
+        """Read contours in a slice of frames, selected by label as in `DataFrame.loc`."""
+        with HDF5_LOCK:
+            source = DECODE_CACHE.get(
+                path,
+                PARAMS.paths.uncompressed_contours / path.name,
+                write_decoded_contours,
+            )
+            df: DF = read_hdf(source)  # type: ignore  # pyright 1.1.333
+        return df if frames == ALL_FRAMES else df.loc[IndexSlice[frames, :], :]
+
+
+class ParquetContourStore:
+    """Contour tables in Parquet files, partitioned into row groups of frames.
+
+    Row groups record the range of frames they contain, so reading a slice of frames
+    skips row groups outside of it. Files are memory-mapped when read.
+
+    Args:
+        frames_per_group: Number of frames in each row group.
+        compression: Parquet compression codec.
+    """
+
+    ext = "parquet"
+
+    def __init__(self, frames_per_group: int = 100, compression: str = "zstd"):
+        self.frames_per_group = frames_per_group
+        """Number of frames in each row group."""
+        self.compression = compression
+        """Parquet compression codec."""
+
+    def write(self, df: DF, path: Path):
+        """Write a contour table."""
+        table = Table.from_pandas(df.reset_index(), preserve_index=False)
+        frames = table["frame"].to_numpy()
+        last_frame = frames[-1] if len(frames) else 0
+        bounds = searchsorted(
+            frames, arange(0, last_frame + self.frames_per_group, self.frames_per_group)
+        )
+        with ParquetWriter(path, table.schema, compression=self.compression) as writer:
+            if not len(frames):
+                writer.write_table(table)
+            for start, stop in pairwise([*bounds, len(frames)]):
+                if stop > start:
+                    writer.write_table(table.slice(start, stop - start))
+
+    def read(self, path: Path, frames: slice = ALL_FRAMES) -> DF:
+        """Read contours in a slice of frames, selected by label as in `DataFrame.loc`."""
+        filters = [
+            *([("frame", ">=", frames.start)] if frames.start is not None else []),
+            *([("frame", "<=", frames.stop)] if frames.stop is not None else []),
+        ]
+        df = (
+            read_table(path, filters=filters or None, memory_map=True)
+            .to_pandas()
+            .set_index(INDEX)
+        )
+        return df.loc[IndexSlice[frames, :], :] if frames.step else df
+
+
+def write_decoded_contours(source: Path, destination: Path, mode: DecodeMode):
+    """Write a decoded copy of contours, suitable for fast reads."""
+    df: DF = read_hdf(source)  # type: ignore  # pyright 1.1.333
+    if mode == "uncompressed":
+        df.to_hdf(destination, key="contours", complevel=None, complib=None)
+    else:
+        df.to_hdf(destination, key="contours", complevel=1, complib="blosc:lz4")
+
+
+CONTOUR_STORES: dict[str, ContourStore] = {
+    "hdf": HdfContourStore(),
+    "parquet": ParquetContourStore(),
+}
+"""Named contour stores."""
+DEFAULT_CONTOUR_STORE = CONTOUR_STORES[CONTOUR_STORE]
+"""Default contour store to write to, and to read from first."""
+UNOBSTRUCTED_STORE = ParquetContourStore()
+"""Store for the frame and contour numbers of unobstructed bubbles."""
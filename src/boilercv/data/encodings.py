@@ -0,0 +1,79 @@
+"""Encoding policies for videos written to disk."""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Literal, TypeAlias
+
+from boilercv import ENCODING
+
+Compression: TypeAlias = Literal[
+    "zlib", "zstd", "blosc_lz4", "blosc_lz4hc", "blosc_zlib", "blosc_zstd"
+]
+"""Compressors available through the netCDF4 library."""
+Shuffle: TypeAlias = Literal["none", "byte", "bit"]
+"""Shuffle filters applied before compression."""
+
+BLOSC_SHUFFLES: dict[Shuffle, int] = {"none": 0, "byte": 1, "bit": 2}
+"""Blosc shuffle filter codes."""
+
+
+@dataclass(frozen=True)
+class Encoding:
+    """Policy for encoding a video variable on disk.
+
+    Compressed videos are chunked along frames, so reading a few frames only
+    decompresses the chunks containing them, rather than the whole variable.
+
+    Args:
+        compression: Compressor. Uncompressed and contiguous if `None`.
+        level: Compression level.
+        shuffle: Shuffle filter. Bit-shuffling groups the bits of packed pixels from
+            neighboring frames, and is only available with Blosc compressors.
+        chunk_frames: Number of frames in each chunk.
+    """
+
+    compression: Compression | None = "zlib"
+    level: int = 4
+    shuffle: Shuffle = "byte"
+    chunk_frames: int = 16
+
+    def __post_init__(self):
+        if self.shuffle == "bit" and not str(self.compression).startswith("blosc"):
+            raise ValueError("Bit-shuffling is only available with Blosc compressors.")
+
+    def get(self, shape: Sequence[int]) -> dict[str, Any]:
+        """Get keyword arguments for creating a video variable of a certain shape.
+
+        Suitable for `encoding` in `xarray.Dataset.to_netcdf` and for
+        `netCDF4.Dataset.createVariable`.
+        """
+        if self.compression is None:
+            return {"compression": None, "contiguous": True}
+        encoding: dict[str, Any] = {
+            "compression": self.compression,
+            "complevel": self.level,
+            "chunksizes": (max(1, min(self.chunk_frames, shape[0])), *shape[1:]),
+        }
+        if self.compression.startswith("blosc"):
+            return {
+                **encoding,
+                "shuffle": False,
+                "blosc_shuffle": BLOSC_SHUFFLES[self.shuffle],
+            }
+        return {**encoding, "shuffle": self.shuffle == "byte"}
+
+
+ENCODINGS = {
+    "zlib": Encoding(),
+    "zstd": Encoding("zstd", level=3),
+    "blosc": Encoding("blosc_zstd", level=3),
+    "bitshuffle": Encoding("blosc_zstd", level=3, shuffle="bit"),
+    "blosc_lz4": Encoding("blosc_lz4", level=5, shuffle="bit"),
+}
+"""Named encoding policies."""
+UNCOMPRESSED = Encoding(compression=None)
+"""Uncompressed, contiguous encoding, suitable for memory-mapping."""
+FAST = Encoding("blosc_lz4", level=1, shuffle="none")
+"""Lightly-compressed encoding which decompresses quickly."""
+DEFAULT_ENCODING = ENCODINGS[ENCODING]
+"""Default encoding policy for processed videos."""
@@ -0,0 +1,133 @@
+"""Manifests of the inputs each processed dataset was made from.
+
+Each destination directory has a manifest recording, for each output in it, a hash of
+the files it was made from, such as its source video, its ROI, and the module of the
+stage that made it, and of the parameters of that stage. Outputs whose inputs hash
+differently than when they were written are stale, so only videos whose inputs actually
+changed are reprocessed. The manifest is kept next to the outputs it describes, so it
+travels with them.
+
+Stages list the source files of the functions they compute with among their inputs, as
+from `get_source_files`, so that changes to those functions reprocess their outputs.
+"""
+
+import json
+from collections.abc import Callable, Iterable, Mapping
+from hashlib import sha256
+from inspect import getfile, unwrap
+from os.path import relpath
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import RLock
+from types import ModuleType
+from typing import Any
+
+from boilercv.data.cache import get_stamp
+
+MANIFEST = "manifest.json"
+"""Name of the manifest in each destination directory."""
+
+
+class Manifest:
+    """Hashes of the inputs each output in a directory was made from.
+
+    Checksums of input files are recorded alongside their size and modification time,
+    and only recomputed for files that changed since, as in `DecodeCache`. Hashes are
+    computed when outputs are checked, and recorded once they're written.
+
+    Args:
+        directory: Destination directory.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        """Destination directory."""
+        self.path = directory / MANIFEST
+        """Path to the manifest."""
+        manifest = (
+            json.loads(self.path.read_text(encoding="utf-8"))
+            if self.path.exists()
+            else {}
+        )
+        self.outputs: dict[str, str] = manifest.get("outputs", {})
+        """Hashes of the inputs of each output, keyed by output file name."""
+        self.files: dict[str, dict[str, Any]] = manifest.get("files", {})
+        """Stamps of input files, keyed by their path relative to the directory."""
+        self.pending: dict[str, str] = {}
+        """Hashes of the current inputs of checked outputs, until they're recorded."""
+        self._lock = RLock()
+
+    def is_current(
+        self, destination: Path, inputs: Iterable[Path], params: Mapping[str, Any]
+    ) -> bool:
+        """Check whether an output was made from its current inputs and parameters."""
+        digest = self.get_hash(inputs, params)
+        with self._lock:
+            self.pending[destination.name] = digest
+            return destination.exists() and self.outputs.get(destination.name) == digest
+
+    def record(self, destination: Path):
+        """Record an output as made from the inputs it was last checked against."""
+        with self._lock:
+            if destination.name not in self.pending or not destination.exists():
+                return
+            self.outputs[destination.name] = self.pending.pop(destination.name)
+            self.save()
+
+    def get_hash(self, inputs: Iterable[Path], params: Mapping[str, Any]) -> str:
+        """Get a hash of input files by their contents, and of parameters."""
+        digest = sha256()
+        for path in sorted(inputs):
+            digest.update(json.dumps([path.name, self.get_checksum(path)]).encode())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def get_checksum(self, path: Path) -> str | None:
+        """Get the checksum of an input file, or `None` if it doesn't exist."""
+        if not path.exists():
+            return None
+        try:
+            key = Path(relpath(path, self.directory)).as_posix()
+        # Windows paths on different drives have no relative path
+        except ValueError:
+            key = path.resolve().as_posix()
+        current = get_stamp(path)
+        with self._lock:
+            stamp = self.files.get(key, {})
+            if all(stamp.get(k) == v for k, v in current.items()):
+                return stamp["sha256"]
+        stamp = get_stamp(path, checksum=True)
+        with self._lock:
+            self.files[key] = stamp
+        return stamp["sha256"]
+
+    def save(self):
+        """Write the manifest, replacing the previous one all at once."""
+        with self._lock:
+            manifest = {"outputs": self.outputs, "files": self.files}
+            with NamedTemporaryFile(
+                "w", dir=self.directory, suffix=".tmp", delete=False, encoding="utf-8"
+            ) as file:
+                json.dump(manifest, file, indent=2, sort_keys=True)
+            Path(file.name).replace(self.path)
+
+
+def get_source_files(*objects: ModuleType | Callable[..., Any]) -> list[Path]:
+    """Get the source files of modules or functions, looking through decorators."""
+    return sorted({Path(getfile(unwrap(obj))) for obj in objects})  # type: ignore
+
+
+MANIFESTS: dict[Path, Manifest] = {}
+"""Manifests of destination directories used in this process."""
+
+
+def load_manifest(directory: Path) -> Manifest:
+    """Read the manifest of a destination directory, recording outputs in it from now."""
+    MANIFESTS[directory] = manifest = Manifest(directory)
+    return manifest
+
+
+def record_processed(destination: Path):
+    """Record an output as processed, if its inputs were checked with a manifest."""
+    if (manifest := MANIFESTS.get(destination.parent)) is not None:
+        manifest.record(destination)
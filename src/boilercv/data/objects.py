@@ -0,0 +1,93 @@
+"""Bubble objects and their geometry, computed from contours."""
+
+from numpy import absolute, add, arange, flatnonzero, hypot, pi, r_, repeat, sqrt
+from pandas import DataFrame
+
+from boilercv.types import DF
+
+OBJECTS_COLS = [
+    "y",
+    "x",
+    "frame",
+    "size",
+    "area",
+    "diameter_px",
+    "radius_of_gyration_px",
+]
+"""Columns of object tables, matching Trackpy for the first four."""
+MIN_VERTICES = 4
+"""Minimum number of vertices in a contour for it to be considered an object."""
+
+
+def get_objects(
+    contours: DF, min_vertices: int = MIN_VERTICES, area_weighted: bool = False
+) -> DF:
+    """Get the geometry of every contour at once.
+
+    Computes the area of each contour by the shoelace formula, its centroid, and the
+    diameter of a circle with equal area. Vertices are reduced by contour in segments of
+    the flat contours table, rather than building a polygon for each contour.
+
+    Args:
+        contours: Contours, as from `get_contours_df`, sorted by frame and contour.
+        min_vertices: Minimum number of vertices in a contour to keep it.
+        area_weighted: Whether to get the centroid of the area enclosed by each contour,
+            as in `shapely.Polygon`. Otherwise, get the centroid of its perimeter, as in
+            `shapely.LinearRing`. Contours enclosing no area always get the latter.
+
+    Returns:
+        Objects sorted by frame and centroid, with the columns in `OBJECTS_COLS`.
+    """
+    frame = contours.index.get_level_values("frame").to_numpy()
+    contour = contours.index.get_level_values("contour").to_numpy()
+    # Find the first vertex of each contour, and keep contours with enough vertices
+    starts = flatnonzero(
+        r_[True, (frame[1:] != frame[:-1]) | (contour[1:] != contour[:-1])]
+    )
+    counts = r_[starts[1:], len(frame)] - starts
+    keep = repeat(counts >= min_vertices, counts)
+    counts = counts[counts >= min_vertices]
+    starts = counts.cumsum() - counts
+    frame = frame[keep][starts]
+    y = contours["ypx"].to_numpy(dtype=float)[keep]
+    x = contours["xpx"].to_numpy(dtype=float)[keep]
+    # Pair each vertex with the next, wrapping around at the end of each contour
+    next_vertex = arange(1, len(x) + 1)
+    next_vertex[starts + counts - 1] = starts
+    y_next, x_next = y[next_vertex], x[next_vertex]
+    cross = x * y_next - x_next * y
+    signed_area = _sum_segments(cross, starts) / 2
+    length = hypot(x_next - x, y_next - y)
+    perimeter = _sum_segments(length, starts)
+    y_centroid = _sum_segments((y + y_next) * length, starts) / (2 * perimeter)
+    x_centroid = _sum_segments((x + x_next) * length, starts) / (2 * perimeter)
+    if area_weighted:
+        # Contours enclosing no area keep the centroid of their perimeter
+        enclosed = signed_area != 0
+        denom = 6 * signed_area[enclosed]
+        y_centroid[enclosed] = (
+            _sum_segments((y + y_next) * cross, starts)[enclosed] / denom
+        )
+        x_centroid[enclosed] = (
+            _sum_segments((x + x_next) * cross, starts)[enclosed] / denom
+        )
+    area = absolute(signed_area)
+    diameter = sqrt(4 * area / pi)
+    return (
+        DataFrame({
+            "y": y_centroid,
+            "x": x_centroid,
+            "frame": frame,
+            "size": diameter / 4,
+            "area": area,
+            "diameter_px": diameter,
+            "radius_of_gyration_px": diameter / 4,
+        })
+        .loc[:, OBJECTS_COLS]
+        .sort_values(["frame", "y", "x"], ignore_index=True)
+    )
+
+
+def _sum_segments(values, starts):
+    """Sum values in segments beginning at each start."""
+    return add.reduceat(values, starts) if len(starts) else values[:0]
@@ -1,6 +1,18 @@
 """Packing and unpacking of binarized video data."""
 
-from numpy import packbits, unpackbits
+from numpy import (
+    arange,
+    bitwise_and,
+    bitwise_not,
+    bitwise_or,
+    empty,
+    int64,
+    packbits,
+    take,
+    uint8,
+    uint64,
+    unpackbits,
+)
 from xarray import apply_ufunc
 
 from boilercv.data import (
@@ -12,7 +24,20 @@ from boilercv.data import (
     XPX,
     XPX_PACKED,
 )
-from boilercv.types import DA
+from boilercv.types import DA, ArrInt, ImgBool, Vid
+
+SCALED_BITS = unpackbits(arange(256, dtype=uint8)[:, None], axis=1) * uint8(255)
+"""Bits of each byte, most significant first as in `packbits`, scaled to 0 or 255."""
+SCALED_BITS_LUT = SCALED_BITS.view(uint64).ravel()
+"""Lookup table of the eight scaled bits of each byte, as one 64-bit word."""
+INVERTED_SCALED_BITS_LUT = (~SCALED_BITS).view(uint64).ravel()
+"""Lookup table of the eight inverted, scaled bits of each byte, as one 64-bit word."""
+UNPACK_BLOCK = 2**16
+"""Number of packed bytes to unpack at once in `unpack_scaled`."""
+POPCOUNT = unpackbits(arange(256, dtype=uint8)[:, None], axis=1).sum(
+    axis=1, dtype=uint8
+)
+"""Number of set bits in each byte."""
 
 
 def pack(da: DA) -> DA:
@@ -48,3 +73,91 @@ def unpack(da: DA) -> DA:
         .rename(VIDEO)
         .astype(bool)
     )
+
+
+def unpack_scaled(packed: ArrInt, out: Vid | None = None, invert: bool = False) -> Vid:
+    """Unpack bits of the last dimension straight into images scaled to 0 or 255.
+
+    Equivalent to `scale_bool` after unpacking, or `bitwise_not` of that if inverted,
+    but each packed byte is looked up as a 64-bit word of eight scaled pixels and
+    written into the output in blocks, without any full-size temporaries.
+
+    Args:
+        packed: Bit-packed images, such as the values of a packed video.
+        out: Destination for the unpacked images. Must be C-contiguous, with a last
+            dimension eight times that of `packed`.
+        invert: Whether to unpack set bits to 0 and unset bits to 255.
+
+    Returns:
+        Unpacked images.
+    """
+    shape = (*packed.shape[:-1], packed.shape[-1] * 8)
+    out = empty(shape, dtype=uint8) if out is None else out
+    if out.shape != shape or not out.flags.c_contiguous:
+        raise ValueError(f"Output must be C-contiguous with shape {shape}.")
+    lut = INVERTED_SCALED_BITS_LUT if invert else SCALED_BITS_LUT
+    packed, words = packed.reshape(-1), out.view(uint64).reshape(-1)
+    # Lookups cast packed bytes to indices, so limit the size of that temporary
+    for start in range(0, len(packed), UNPACK_BLOCK):
+        block = slice(start, start + UNPACK_BLOCK)
+        # Clipping skips bounds checks, which would buffer the output
+        take(lut, packed[block], out=words[block], mode="clip")
+    return out
+
+
+# * -------------------------------------------------------------------------------- * #
+# * PACKED-DOMAIN OPERATIONS
+# * Operate on the packed bits of the last dimension of arrays, as written by `pack`,
+# * without unpacking them. Padding bits of the last byte of each row stay unset.
+
+
+def pack_img(img: ImgBool) -> ArrInt:
+    """Pack the bits of the last dimension of an image, such as an ROI."""
+    return packbits(img, axis=-1)
+
+
+def unpack_img(packed: ArrInt) -> ImgBool:
+    """Unpack the bits of the last dimension of a packed image or video."""
+    return unpackbits(packed, axis=-1).view(bool)
+
+
+def packed_and(a: ArrInt, b: ArrInt, out: ArrInt | None = None) -> ArrInt:
+    """Pixels set in both packed images, broadcasting as in `numpy.bitwise_and`."""
+    return bitwise_and(a, b, out=out)
+
+
+def packed_or(a: ArrInt, b: ArrInt, out: ArrInt | None = None) -> ArrInt:
+    """Pixels set in either packed image, broadcasting as in `numpy.bitwise_or`."""
+    return bitwise_or(a, b, out=out)
+
+
+def packed_not(
+    packed: ArrInt, width: int | None = None, out: ArrInt | None = None
+) -> ArrInt:
+    """Invert a packed image.
+
+    Args:
+        packed: Packed image or video.
+        width: Unpacked width, so that padding bits stay unset. Default: a whole number
+            of bytes.
+        out: Destination for the inverted image.
+    """
+    out = bitwise_not(packed, out=out)
+    if width is not None and (padding := packed.shape[-1] * 8 - width):
+        out[..., -1] &= uint8(0xFF << padding & 0xFF)
+    return out
+
+
+def any_frames(packed: ArrInt) -> ArrInt:
+    """Pixels set in any frame of a packed video, like `max` over frames."""
+    return bitwise_or.reduce(packed, axis=0)
+
+
+def all_frames(packed: ArrInt) -> ArrInt:
+    """Pixels set in all frames of a packed video, like `min` over frames."""
+    return bitwise_and.reduce(packed, axis=0)
+
+
+def count_pixels(packed: ArrInt) -> ArrInt:
+    """Count set pixels in each packed image of a video, or in a single image."""
+    return POPCOUNT[packed].sum(axis=(-2, -1), dtype=int64)
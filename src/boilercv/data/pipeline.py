@@ -0,0 +1,135 @@
+"""Pipelines overlapping reading, computing, and writing in stage loops.
+
+Stage loops read an item, such as a video or a chunk of its frames, compute on it, and
+write the result, so the processor sits idle during reads and writes, and the disk sits
+idle during computation. In a pipeline, items are read ahead on a background thread and
+results are written on another while this thread computes. Queues between them are
+bounded, capping the memory held by items read ahead and results waiting to be written.
+
+HDF5, which backs NetCDF files, isn't safe to use from several threads at once. Reads
+and writes through `xarray` hold its `HDF5_LOCK`, so hold that lock when reading or
+writing HDF5 files any other way in a pipeline, as `chunks.write_frames` does. Don't
+call `xarray` while holding it, as the lock can't be acquired twice.
+"""
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from itertools import islice
+from types import TracebackType
+from typing import Any, Self, TypeVar
+
+from boilercv import PREFETCH
+
+T = TypeVar("T")
+R = TypeVar("R")
+U = TypeVar("U")
+
+
+def prefetch(
+    read: Callable[[T], R], items: Iterable[T], size: int = PREFETCH
+) -> Iterator[tuple[T, R]]:
+    """Read items ahead on a background thread, yielding them in order.
+
+    Args:
+        read: Function reading an item.
+        items: Items to read.
+        size: Number of items to read ahead of the one yielded. At least one.
+
+    Yields:
+        Each item and what was read for it.
+    """
+    items = iter(items)
+    pending: deque[tuple[T, Future[R]]] = deque()
+    executor = ThreadPoolExecutor(1, thread_name_prefix="prefetch")
+
+    def submit(item: T):
+        # Run in this context, so reads are measured against the video being processed
+        pending.append((item, executor.submit(copy_context().run, read, item)))
+
+    try:
+        for item in islice(items, max(size, 1)):
+            submit(item)
+        while pending:
+            item, future = pending.popleft()
+            result = future.result()
+            for next_item in islice(items, 1):
+                submit(next_item)
+            yield item, result
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+class Writer:
+    """Writes results on a background thread, in the order they're submitted.
+
+    Use as a context manager, which waits for all writes to finish when leaving it.
+    Errors raised by writes are raised by a later `submit`, or when leaving the context.
+    Writes waiting to start are cancelled if the context is left by an error.
+
+    Args:
+        backlog: Number of writes to hold at once. Submitting more waits for the oldest
+            to finish, capping the memory held by results waiting to be written.
+    """
+
+    def __init__(self, backlog: int = PREFETCH):
+        self.backlog = max(backlog, 1)
+        """Number of writes to hold at once."""
+        self._pending: deque[Future[Any]] = deque()
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="writer")
+
+    def submit(self, write: Callable[..., Any], *args: Any):
+        """Write in the background, first waiting for old writes if the backlog is full."""
+        while self._pending and (
+            self._pending[0].done() or len(self._pending) >= self.backlog
+        ):
+            self._pending.popleft().result()
+        self._pending.append(self._executor.submit(copy_context().run, write, *args))
+
+    def close(self):
+        """Wait for all writes to finish."""
+        try:
+            while self._pending:
+                self._pending.popleft().result()
+        finally:
+            self._executor.shutdown()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ):
+        if exc_type is None:
+            self.close()
+            return
+        self._pending.clear()
+        self._executor.shutdown(cancel_futures=True)
+
+
+def pipeline(
+    items: Iterable[T],
+    read: Callable[[T], R],
+    compute: Callable[[T, R], U],
+    write: Callable[[T, U], Any],
+    size: int = PREFETCH,
+):
+    """Read, compute, and write each item, overlapping reads and writes with computing.
+
+    Items are computed on this thread, in order. Computations may hand work to pools
+    of threads or processes of their own.
+
+    Args:
+        items: Items to process.
+        read: Function reading an item.
+        compute: Function taking an item and what was read, and returning a result.
+        write: Function taking an item and its result, and writing the result.
+        size: Number of items to read ahead, and of results waiting to be written.
+    """
+    with Writer(size) as writer:
+        for item, data in prefetch(read, items, size):
+            writer.submit(write, item, compute(item, data))
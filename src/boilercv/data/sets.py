@@ -1,32 +1,71 @@
 """Datasets."""
 
-from collections.abc import Iterator
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
 from contextlib import contextmanager
+from functools import cache
+from os import cpu_count
 from pathlib import Path
-from typing import Any, Literal, TypeAlias
+from types import TracebackType
+from typing import Any, Literal, Self, TypeAlias, TypeVar
 
-from pandas import read_hdf
+from h5py import File
+from netCDF4 import Dataset as NetCDFFile
+from numpy import empty, int64, memmap, uint8, zeros
+from tqdm import tqdm
 from xarray import Dataset, open_dataset
 
-from boilercv.data import HEADER, ROI, VIDEO
-from boilercv.data.packing import unpack
+from boilercv import SHARD_SIZE, WORKERS
+from boilercv.data import ALL_FRAMES, FRAME, HEADER, ROI, VIDEO
+from boilercv.data.cache import DECODE_CACHE, FRAME_CACHE, DecodeMode
+from boilercv.data.chunks import CHUNK_SIZE, get_chunks
+from boilercv.data.contours import (
+    CONTOUR_STORES,
+    DEFAULT_CONTOUR_STORE,
+    UNOBSTRUCTED_STORE,
+    ContourStore,
+)
+from boilercv.data.encodings import DEFAULT_ENCODING, FAST, UNCOMPRESSED, Encoding
+from boilercv.data.manifest import load_manifest, record_processed
+from boilercv.data.packing import (
+    any_frames,
+    count_pixels,
+    packed_or,
+    unpack,
+    unpack_img,
+    unpack_scaled,
+)
+from boilercv.instrument import (
+    Measurement,
+    call_measured,
+    get_name,
+    instrument,
+    measure,
+    record,
+)
 from boilercv.models.params import PARAMS
 from boilercv.models.paths import get_sorted_paths
-from boilercv.types import DF, DS
+from boilercv.types import DF, DS, ArrBool, ArrInt, ImgBool, Vid, VidBool
 
-ALL_FRAMES = slice(None)
-"""Slice that gets all frames."""
-ALL_STEMS = [source.stem for source in get_sorted_paths(PARAMS.paths.sources)]
-"""The stems of all dataset sources."""
 STAGE_DEFAULT = "sources"
 """Default stage to work on."""
 
 Stage: TypeAlias = Literal["large_sources", "sources", "filled"]
+T = TypeVar("T")
 
 
 @contextmanager
 def process_datasets(
-    destination_dir: Path, reprocess: bool = False
+    destination_dir: Path,
+    reprocess: bool = False,
+    encoding: Encoding = DEFAULT_ENCODING,
 ) -> Iterator[dict[str, Any]]:
     """Get unprocessed dataset names and write them to disk.
 
@@ -41,86 +80,484 @@ def process_datasets(
     Args:
         destination_dir: The directory to write datasets to.
         reprocess: Whether to reprocess all datasets.
+        encoding: Encoding policy for the video of each dataset.
     """
     unprocessed_destinations = get_unprocessed_destinations(
         destination_dir, reprocess=reprocess
     )
     datasets_to_process = dict.fromkeys(unprocessed_destinations)
-    yield datasets_to_process
-    for name, ds in datasets_to_process.items():
-        if ds is None:
-            continue
-        ds.to_netcdf(
-            path=unprocessed_destinations[name], encoding={VIDEO: {"zlib": True}}
-        )
+    with measure("process_datasets"):
+        yield datasets_to_process
+        for name, ds in datasets_to_process.items():
+            if ds is None:
+                continue
+            with measure("save_dataset", name):
+                save_dataset(ds, unprocessed_destinations[name], encoding)
+            record_processed(unprocessed_destinations[name])
+
+
+def process_in_parallel(
+    func: Callable[[str, Path], Any],
+    destinations: Mapping[str, Path],
+    workers: int | None = WORKERS,
+):
+    """Process datasets in worker processes which handle their own output.
+
+    Each output is recorded by `record_processed` as soon as its worker finishes.
+
+    Args:
+        func: Function taking a dataset name and its destination, writing its result.
+        destinations: Mapping of dataset names to destinations.
+        workers: Number of worker processes. Default: number of processors.
+    """
+    for name, _ in _run_in_parallel(
+        func, {name: (name, dest) for name, dest in destinations.items()}, workers
+    ):
+        record_processed(destinations[name])
+
+
+def map_in_parallel(
+    func: Callable[[str], T], names: Iterable[str], workers: int | None = WORKERS
+) -> Iterator[tuple[str, T]]:
+    """Apply a function to dataset names in worker processes.
+
+    Args:
+        func: Function taking a dataset name.
+        names: Dataset names.
+        workers: Number of worker processes. Default: number of processors.
+
+    Yields:
+        Dataset names and their results, in the order that workers finish them.
+    """
+    yield from _run_in_parallel(func, {name: (name,) for name in names}, workers)
+
+
+def map_shards_in_parallel(
+    func: Callable[[str, slice], T],
+    num_frames: Mapping[str, int],
+    shard_size: int = SHARD_SIZE,
+    workers: int | None = WORKERS,
+) -> Iterator[tuple[str, slice, T]]:
+    """Apply a function to shards of frames of videos in worker processes.
+
+    Each video is split into shards of consecutive frames, and shards of all videos
+    share one pool of workers, so a long video doesn't hold up a stage by running in a
+    single worker. The first shard of each video is processed before the rest, so work
+    done once per video, such as writing decoded copies to `DECODE_CACHE`, isn't
+    repeated by several workers at once. Only as many videos as there are workers are
+    processed at once.
+
+    Args:
+        func: Function taking a dataset name and a slice of frame positions.
+        num_frames: Mapping of dataset names to their number of frames.
+        shard_size: Number of frames in each shard.
+        workers: Number of worker processes. Default: number of processors.
+
+    Yields:
+        Dataset names, shards, and their results. The shards of each video are yielded
+        in frame order, regardless of the order that workers finish them.
+    """
+    shards = {
+        name: list(get_chunks(frames, shard_size)) or [slice(0, 0)]
+        for name, frames in num_frames.items()
+    }
+    total = sum(len(name_shards) for name_shards in shards.values())
+    if workers == 1 or total <= 1:
+        for name, shard in tqdm([
+            (name, shard)
+            for name, name_shards in shards.items()
+            for shard in name_shards
+        ]):
+            with measure(get_name(func), name):
+                result = func(name, shard)
+            yield name, shard, result
+        return
+    yield from _map_shards_in_pool(func, shards, workers)
+
+
+def _map_shards_in_pool(
+    func: Callable[[str, slice], T],
+    shards: Mapping[str, list[slice]],
+    workers: int | None = WORKERS,
+) -> Iterator[tuple[str, slice, T]]:
+    """Apply a function to shards in a pool of workers, yielding them in frame order.
+
+    Only as many videos as there are workers are processed at once, and the next video
+    is started once all shards of one are yielded, so callers collecting the shards of
+    each video hold only that many videos at once.
+    """
+    finished: dict[tuple[str, int], T] = {}
+    next_shards = dict.fromkeys(shards, 0)
+    waiting = deque(shards)
+    total = sum(len(name_shards) for name_shards in shards.values())
+    pending: dict[Future[tuple[T, list[Measurement]]], tuple[str, int]] = {}
+    with get_pool(workers) as executor, tqdm(total=total) as progress:
+
+        def submit(name: str, i: int):
+            future = executor.submit(call_measured, func, name, name, shards[name][i])
+            pending[future] = (name, i)
+
+        for _ in range(min(len(waiting), workers or cpu_count() or 1)):
+            submit(waiting.popleft(), 0)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, i = pending.pop(future)
+                result, measurements = future.result()
+                for measurement in measurements:
+                    record(measurement)
+                progress.update()
+                if i == 0:
+                    for j in range(1, len(shards[name])):
+                        submit(name, j)
+                finished[name, i] = result
+                while (name, next_shards[name]) in finished:
+                    j = next_shards[name]
+                    next_shards[name] += 1
+                    yield name, shards[name][j], finished.pop((name, j))
+                if next_shards[name] == len(shards[name]) and waiting:
+                    submit(waiting.popleft(), 0)
+
+
+def _run_in_parallel(
+    func: Callable[..., T],
+    args: Mapping[str, tuple[Any, ...]],
+    workers: int | None = WORKERS,
+) -> Iterator[tuple[str, T]]:
+    """Call a function on arguments for each name, yielding results as they finish.
+
+    Runs serially in this process if only one worker is requested, which is simpler to
+    debug and avoids the overhead of starting worker processes. Each call is measured,
+    and measurements taken in workers are recorded in this process.
+    """
+    if workers == 1 or len(args) <= 1:
+        for name, arg in tqdm(args.items()):
+            with measure(get_name(func), name):
+                result = func(*arg)
+            yield name, result
+        return
+    with get_pool(workers) as executor:
+        futures = {
+            executor.submit(call_measured, func, name, *arg): name
+            for name, arg in args.items()
+        }
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            result, measurements = future.result()
+            for measurement in measurements:
+                record(measurement)
+            yield futures[future], result
+
+
+@contextmanager
+def get_pool(workers: int | None = WORKERS) -> Iterator[ProcessPoolExecutor]:
+    """Get a pool of worker processes, removing excess decoded copies once it's done.
+
+    Workers don't remove decoded copies from `DECODE_CACHE`, as they could remove copies
+    that other workers are reading, so copies are removed here once workers are done.
+    """
+    try:
+        with ProcessPoolExecutor(workers) as executor:
+            yield executor
+    finally:
+        for directory in (
+            PARAMS.paths.uncompressed_sources,
+            PARAMS.paths.uncompressed_filled,
+            PARAMS.paths.uncompressed_contours,
+        ):
+            DECODE_CACHE.evict(directory)
+
+
+def save_dataset(ds: DS, path: Path, encoding: Encoding = DEFAULT_ENCODING):
+    """Write a processed dataset to disk, encoding its video with a policy."""
+    ds.to_netcdf(path=path, encoding={VIDEO: encoding.get(ds[VIDEO].shape)})
+
+
+@cache
+def get_all_stems() -> list[str]:
+    """Get the stems of all dataset sources, listing them on first use."""
+    return [source.stem for source in get_sorted_paths(PARAMS.paths.sources)]
+
+
+def __getattr__(name: str) -> Any:
+    """Get lazy module attributes."""
+    if name == "ALL_STEMS":
+        return get_all_stems()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_unprocessed_destinations(
-    destination_dir: Path, ext: str = "nc", reprocess: bool = False
+    destination_dir: Path,
+    ext: str = "nc",
+    reprocess: bool = False,
+    inputs: Callable[[str], Iterable[Path]] | None = None,
+    params: Mapping[str, Any] | None = None,
 ) -> dict[str, Path]:
     """Get destination paths for unprocessed datasets.
 
     Given a destination directory, yield a mapping of unprocessed dataset names to
     destinations with a given file extension. A dataset is considered unprocessed if a
-    file sharing its name is not found in the destination directory.
+    file sharing its name is not found in the destination directory. If its inputs are
+    given, it is also considered unprocessed if they or the parameters changed since it
+    was written, as recorded in the manifest of the destination directory by
+    `record_processed`.
 
     Args:
         destination_dir: The desired destination directory.
         ext: The desired file extension. Default: nc
         reprocess: Whether to reprocess all datasets. Default: False.
+        inputs: Function taking a dataset name and returning the files it's made from.
+        params: Parameters the datasets are made with.
 
     Returns:
         A mapping of unprocessed dataset names to destinations with the given file
     """
     unprocessed_destinations: dict[str, Path] = {}
     ext = ext.lstrip(".")
-    for name in ALL_STEMS:
+    manifest = load_manifest(destination_dir) if inputs else None
+    for name in get_all_stems():
         destination = destination_dir / f"{name}.{ext}"
-        if reprocess or not destination.exists():
+        current = (
+            manifest.is_current(destination, inputs(name), params or {})
+            if manifest and inputs
+            else destination.exists()
+        )
+        if reprocess or not current:
             unprocessed_destinations[name] = destination
     return unprocessed_destinations
 
 
 def inspect_dataset(name: str, stage: Stage = STAGE_DEFAULT) -> DS:
     """Inspect a video dataset."""
-    cmp_source, unc_source = get_stage(name, stage)
-    source = unc_source if unc_source.exists() else cmp_source
+    source, _ = get_stage(name, stage)
     if stage == "large_sources":
         return open_dataset(source) if source.exists() else Dataset()
     with open_dataset(source) as ds:
         return ds
 
 
+@instrument(video="name", resources=True)
 def get_dataset(
     name: str,
     num_frames: int = 0,
     frame: slice = ALL_FRAMES,
     stage: Stage = STAGE_DEFAULT,
+    cache: bool = False,
 ) -> DS:
-    """Load a video dataset."""
+    """Load a video dataset.
+
+    If cached, unpacked videos are kept in the process-wide `FRAME_CACHE`, so repeated
+    loads of the same frames skip reading and unpacking. Cached videos are shared, so
+    they're read-only. Packed videos are read from their decoded copies in
+    `DECODE_CACHE`, if enabled.
+
+    Args:
+        name: Video name.
+        num_frames: Number of frames to load. Default: all.
+        frame: Slice of frames to load. Don't specify both this and `num_frames`.
+        stage: Pipeline stage of the video.
+        cache: Whether to use the cache of unpacked frames. Use it where the same frames
+            are read repeatedly, but not in worker processes, as each has its own.
+    """
     # Can't use `xarray.open_mfdataset` because it requires dask
     # Unpacking is incompatible with dask
     frame = slice_frames(num_frames, frame)
     cmp_source, unc_source = get_stage(name, stage)
-    source = unc_source if unc_source.exists() else cmp_source
     if stage == "large_sources":
-        ds = open_dataset(source)
+        ds = open_dataset(cmp_source)
         return (
             Dataset({VIDEO: ds[VIDEO].sel(frame=frame), HEADER: ds[HEADER]})
-            if source.exists()
+            if cmp_source.exists()
             else Dataset()
         )
     roi = PARAMS.paths.rois / f"{name}.nc"
+    key = (name, stage, frame.start, frame.stop, frame.step, get_mtime(cmp_source))
+    source = DECODE_CACHE.get(cmp_source, unc_source, write_decoded_video)
     with open_dataset(source) as ds, open_dataset(roi) as roi_ds:
-        if not unc_source.exists():
-            Dataset({VIDEO: ds[VIDEO], HEADER: ds[HEADER]}).to_netcdf(
-                path=unc_source, encoding={VIDEO: {"zlib": False}}
+        if cache and (video := FRAME_CACHE.get(key)) is not None:
+            # Blocks promoted from the spill directory are unpickled as writable
+            video.values.flags.writeable = False
+            video = video.copy(deep=False)
+        else:
+            video = unpack(ds[VIDEO].sel(frame=frame)).load()
+            if cache:
+                video.values.flags.writeable = False
+                FRAME_CACHE.put(key, video.copy(deep=False))
+        return Dataset({VIDEO: video, ROI: roi_ds[ROI], HEADER: ds[HEADER]})
+
+
+def get_scaled_video(
+    name: str,
+    num_frames: int = 0,
+    frame: slice = ALL_FRAMES,
+    stage: Stage = STAGE_DEFAULT,
+    invert: bool = False,
+    out: Vid | None = None,
+) -> Vid:
+    """Load a bit-packed video unpacked straight into images scaled to 0 or 255.
+
+    Equivalent to `scale_bool` of the video from `get_dataset`, or `bitwise_not` of
+    that if inverted, but only the packed video and the result are held in memory.
+
+    Args:
+        name: Video name.
+        num_frames: Number of frames to load. Default: all.
+        frame: Slice of frames to load. Don't specify both this and `num_frames`.
+        stage: Pipeline stage of the video. Must be a bit-packed stage.
+        invert: Whether to make bright pixels dark and vice versa.
+        out: Destination for the video, as in `unpack_scaled`.
+    """
+    if stage == "large_sources":
+        raise ValueError("Only bit-packed stages can be unpacked.")
+    frame = slice_frames(num_frames, frame)
+    cmp_source, unc_source = get_stage(name, stage)
+    source = DECODE_CACHE.get(cmp_source, unc_source, write_decoded_video)
+    with open_dataset(source) as ds:
+        return unpack_scaled(ds[VIDEO].sel(frame=frame).values, out, invert)
+
+
+def get_num_frames(name: str, stage: Stage = STAGE_DEFAULT) -> int:
+    """Get the number of frames in a video, without reading them."""
+    source, _ = get_stage(name, stage)
+    with NetCDFFile(source) as file:
+        return file.dimensions[FRAME].size
+
+
+def get_mtime(path: Path) -> int:
+    """Get the modification time of a file in nanoseconds, identifying its version."""
+    return path.stat().st_mtime_ns
+
+
+def write_decoded_video(source: Path, destination: Path, mode: DecodeMode):
+    """Write a decoded copy of a packed video dataset, suitable for fast reads."""
+    with open_dataset(source) as ds:
+        save_dataset(
+            Dataset({VIDEO: ds[VIDEO], HEADER: ds[HEADER]}),
+            destination,
+            UNCOMPRESSED if mode == "uncompressed" else FAST,
+        )
+
+
+def get_roi(name: str) -> ArrBool:
+    """Load the ROI of a video."""
+    with open_dataset(PARAMS.paths.rois / f"{name}.nc") as roi_ds:
+        return roi_ds[ROI].values
+
+
+class LazyVideo:
+    """A bit-packed video, memory-mapped from disk and unpacked on demand.
+
+    Only frames that are indexed or iterated over are read and unpacked. The packed
+    video is memory-mapped from its decoded copy in `DECODE_CACHE` if it is
+    uncompressed, otherwise frames are read through netCDF4. Use as a context manager,
+    or call `close` when finished.
+
+    Args:
+        name: Video name.
+        stage: Pipeline stage of the video. Must be a bit-packed stage.
+    """
+
+    def __init__(self, name: str, stage: Stage = STAGE_DEFAULT):
+        if stage == "large_sources":
+            raise ValueError("Only bit-packed stages can be accessed lazily.")
+        self.name = name
+        """Video name."""
+        self.stage: Stage = stage
+        """Pipeline stage of the video."""
+        cmp_source, unc_source = get_stage(name, stage)
+        self.path = DECODE_CACHE.get(cmp_source, unc_source, write_decoded_video)
+        """Path to the packed video."""
+        with File(self.path, "r") as file:
+            dataset = file[VIDEO]
+            offset = dataset.id.get_offset()
+            contiguous = offset is not None and dataset.chunks is None
+            dtype, shape = dataset.dtype, dataset.shape
+        self._file: NetCDFFile | None = None
+        self.packed: Any
+        """Packed video. A memory map if possible, otherwise a netCDF variable."""
+        if contiguous:
+            self.packed = memmap(
+                self.path, dtype=dtype, mode="r", offset=offset, shape=shape
             )
-        return Dataset({
-            VIDEO: unpack(ds[VIDEO].sel(frame=frame)),
-            ROI: roi_ds[ROI],
-            HEADER: ds[HEADER],
-        })
+        else:
+            self._file = NetCDFFile(self.path)
+            self._file.set_auto_mask(False)
+            self.packed = self._file[VIDEO]
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        """Shape of the unpacked video."""
+        num_frames, height, packed_width = self.packed.shape
+        return num_frames, height, packed_width * 8
+
+    def __len__(self) -> int:
+        return self.packed.shape[0]
+
+    def __getitem__(self, frame: int | slice) -> VidBool:
+        """Unpack one frame, or a slice of frames."""
+        return unpack_img(self.packed[frame])
+
+    def __iter__(self) -> Iterator[VidBool]:
+        """Iterate over unpacked frames."""
+        for _, video in self.iter_batches():
+            yield from video
+
+    def iter_batches(
+        self, batch_size: int = CHUNK_SIZE
+    ) -> Iterator[tuple[slice, VidBool]]:
+        """Iterate over batches of unpacked frames, unpacking one batch at a time.
+
+        Args:
+            batch_size: Maximum number of frames in each batch.
+
+        Yields:
+            The slice of frames in each batch, and the unpacked frames.
+        """
+        for frame in get_chunks(len(self), batch_size):
+            yield frame, self[frame]
+
+    def get_composite(
+        self, frame: slice = ALL_FRAMES, batch_size: int = CHUNK_SIZE
+    ) -> ImgBool:
+        """Get pixels set in any frame, reducing packed frames one batch at a time.
+
+        Args:
+            frame: Slice of frame positions to reduce. Default: all.
+            batch_size: Maximum number of frames in each batch.
+        """
+        frames = range(len(self))[frame]
+        # The composite doesn't depend on order, and frames are read faster forwards
+        if frames.step < 0:
+            frames = frames[::-1]
+        composite = zeros(self.packed.shape[1:], dtype=uint8)
+        for batch in get_chunks(len(frames), batch_size):
+            positions = frames[batch]
+            packed = self.packed[positions.start : positions.stop : positions.step]
+            packed_or(composite, any_frames(packed), out=composite)
+        return unpack_img(composite)
+
+    def count_pixels(self, batch_size: int = CHUNK_SIZE) -> ArrInt:
+        """Count set pixels in each frame, without unpacking them."""
+        counts = empty(len(self), dtype=int64)
+        for frame in get_chunks(len(self), batch_size):
+            counts[frame] = count_pixels(self.packed[frame])
+        return counts
+
+    def close(self):
+        """Release the underlying file. Frames can't be accessed afterwards."""
+        if self._file is not None:
+            self._file.close()
+        del self.packed
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ):
+        self.close()
 
 
 def get_stage(name: str, stage: Stage = STAGE_DEFAULT) -> tuple[Path, Path]:
@@ -138,14 +575,54 @@ def get_stage(name: str, stage: Stage = STAGE_DEFAULT) -> tuple[Path, Path]:
         raise ValueError(f"Unknown stage: {stage}")
 
 
-def get_contours_df(name: str) -> DF:
-    """Load contours from a dataset."""
-    unc_cont = PARAMS.paths.uncompressed_contours / f"{name}.h5"
-    contour = unc_cont if unc_cont.exists() else PARAMS.paths.contours / f"{name}.h5"
-    contour_df: DF = read_hdf(contour)  # type: ignore  # pyright 1.1.333
-    if not unc_cont.exists():
-        contour_df.to_hdf(unc_cont, key="contours", complevel=None, complib=None)
-    return contour_df
+@instrument(video="name", resources=True)
+def get_contours_df(
+    name: str, frames: slice = ALL_FRAMES, store: ContourStore = DEFAULT_CONTOUR_STORE
+) -> DF:
+    """Load contours from a dataset.
+
+    Args:
+        name: Video name.
+        frames: Slice of frames to load, selected by label as in `DataFrame.loc`.
+        store: Contour store to read from first. Other stores are tried if the contours
+            aren't in this one.
+    """
+    path, store = get_contours_path(name, store)
+    return store.read(path, frames)
+
+
+def get_contours_path(
+    name: str, store: ContourStore = DEFAULT_CONTOUR_STORE
+) -> tuple[Path, ContourStore]:
+    """Get the path to the contours of a dataset, and the store they're in.
+
+    Args:
+        name: Video name.
+        store: Contour store to look in first. Other stores are tried if the contours
+            aren't in this one.
+    """
+    for store_ in (store, *CONTOUR_STORES.values()):
+        path = PARAMS.paths.contours / f"{name}.{store_.ext}"
+        if path.exists():
+            return path, store_
+    raise FileNotFoundError(f"No contours found for {name}.")
+
+
+def get_unobstructed(name: str, frames: slice = ALL_FRAMES) -> DF:
+    """Load the frame and contour numbers of unobstructed bubbles.
+
+    Args:
+        name: Video name.
+        frames: Slice of frames to load, selected by label as in `DataFrame.loc`.
+    """
+    return UNOBSTRUCTED_STORE.read(
+        PARAMS.paths.unobstructed / f"{name}.{UNOBSTRUCTED_STORE.ext}", frames
+    )
+
+
+def get_frame_labels(shard: slice) -> slice:
+    """Get a slice selecting the frames of a shard by label, which includes its stop."""
+    return slice(shard.start, shard.stop - 1)
 
 
 def slice_frames(num_frames: int = 0, frame: slice = ALL_FRAMES) -> slice:
@@ -1,13 +1,14 @@
 """Video dataset model."""
 
 from dataclasses import asdict
+from itertools import islice
 from pathlib import Path
 
 from boilercine import get_cine_attributes, get_cine_images
+from numpy import broadcast_to, empty
 from scipy.spatial.distance import euclidean
 from xarray import DataArray
 
-from boilercv.captivate.previews import load_roi
 from boilercv.data import (
     FRAME,
     HEADER,
@@ -22,15 +23,30 @@ from boilercv.data import (
     YX,
     assign_ds,
 )
+from boilercv.data.chunks import CHUNK_SIZE, get_chunks, stream_video, write_frames
+from boilercv.data.encodings import UNCOMPRESSED, Encoding
 from boilercv.data.models import Dimension
+from boilercv.data.pipeline import Writer, prefetch
 from boilercv.models.params import PARAMS
-from boilercv.types import DA, DS
+from boilercv.types import DA, DS, Vid
 
 
 def prepare_dataset(
-    cine_source: Path, num_frames: int | None = None, start_frame: int = 0
+    cine_source: Path,
+    num_frames: int | None = None,
+    start_frame: int = 0,
+    read_images: bool = True,
 ) -> DS:
-    """Prepare a dataset from a CINE."""
+    """Prepare a dataset from a CINE.
+
+    Args:
+        cine_source: CINE to read.
+        num_frames: Number of frames to read. Default: all.
+        start_frame: First frame to read.
+        read_images: Whether to read all images. Otherwise, the video is a read-only
+            placeholder repeating the first image, taking no more memory than it, for
+            streaming images to disk later.
+    """
 
     # Header
     header, utc_arr = get_cine_attributes(
@@ -53,6 +69,13 @@ def prepare_dataset(
         parent_dim=frame_dim.dim, dim=UTC_TIME, long_name="UTC time", coords=utc_arr
     )
 
+    # Images
+    if read_images:
+        images = list(get_cine_images(cine_source, num_frames, start_frame))
+    else:
+        first_image = next(iter(get_cine_images(cine_source, 1, start_frame)))
+        images = broadcast_to(first_image, (len(utc_arr), *first_image.shape))
+
     # Dataset
     ds = assign_ds(
         name=VIDEO,
@@ -64,18 +87,74 @@ def prepare_dataset(
             Dimension(dim=XPX, long_name="Width", units="px"),
         ),
         fixed_secondary_dims=(time, utc),
-        data=list(get_cine_images(cine_source, num_frames, start_frame)),
+        data=images,
     )
     ds[header_da.name] = header_da
     return ds
 
 
+def convert_cine(
+    cine_source: Path,
+    destination: Path,
+    num_frames: int | None = None,
+    start_frame: int = 0,
+    chunk_size: int = CHUNK_SIZE,
+    encoding: Encoding = UNCOMPRESSED,
+):
+    """Convert a CINE to a NetCDF dataset, streaming its images to disk.
+
+    Images are read into buffers holding one chunk of frames each, which are written to
+    the video variable on disk when full, so memory use doesn't grow with video length.
+    The next chunk is read while the last is written, as in `boilercv.data.pipeline`.
+
+    Raises:
+        ValueError: If the CINE has fewer images than frames in its header.
+
+    Args:
+        cine_source: CINE to convert.
+        destination: Destination for the dataset.
+        num_frames: Number of frames to convert. Default: all.
+        start_frame: First frame to convert.
+        chunk_size: Number of frames to hold in memory at once.
+        encoding: Encoding policy for the video. Default: uncompressed, so that writes
+            are limited by disk speed.
+    """
+    ds = prepare_dataset(cine_source, num_frames, start_frame, read_images=False)
+    video = ds[VIDEO]
+    images = get_cine_images(cine_source, num_frames, start_frame)
+
+    def read(chunk: slice) -> Vid:
+        buffer = empty((chunk.stop - chunk.start, *video.shape[1:]), dtype=video.dtype)
+        count = 0
+        for image in islice(images, len(buffer)):
+            buffer[count] = image
+            count += 1
+        if count < len(buffer):
+            raise ValueError(
+                f"Read {chunk.start + count} of {video.sizes[FRAME]} frames"
+                f" from {cine_source}."
+            )
+        return buffer
+
+    with (
+        stream_video(
+            destination, ds, video.dims, video.shape, video.dtype, video.attrs, encoding
+        ) as stream,
+        Writer() as writer,
+    ):
+        for chunk, frames in prefetch(read, get_chunks(video.sizes[FRAME], chunk_size)):
+            writer.submit(write_frames, stream, chunk, frames)
+
+
 # * -------------------------------------------------------------------------------- * #
 # * SECONDARY LENGTH DIMENSIONS
 
 
 def assign_length_dims(dataset: DS) -> DS:
     """Assign length scales to "x" and "y" coordinates."""
+    # Previews import Qt, which is slow and not needed to convert videos
+    from boilercv.captivate.previews import load_roi  # noqa: PLC0415
+
     images = dataset[VIDEO]
     parent_dim_units = "px"
     roi = load_roi(images.data, PARAMS.paths.examples / "roi_line.yaml", "line")
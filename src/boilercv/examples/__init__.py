@@ -1,5 +1,8 @@
 """Examples, experiments, and demonstrations."""
 
+from functools import cache
+from typing import Any
+
 from xarray import open_dataset
 
 from boilercv.data import VIDEO
@@ -13,10 +16,17 @@ EXAMPLE_CONTOURS = PARAMS.paths.examples / f"{EXAMPLE_VIDEO_NAME}.h5"
 EXAMPLE_ROI = PARAMS.paths.examples / f"{EXAMPLE_VIDEO_NAME}_roi.yaml"
 
 
+@cache
 def get_images() -> DA:
+    """Get the example video, loading it on first use."""
     with open_dataset(PARAMS.paths.examples / f"{EXAMPLE_VIDEO_NAME}.nc") as ds:
         return ds[VIDEO].sel(frame=slice(None, EXAMPLE_NUM_FRAMES))
 
 
-EXAMPLE_VIDEO = get_images()
-EXAMPLE_FRAME_LIST = list(EXAMPLE_VIDEO.values)
+def __getattr__(name: str) -> Any:
+    """Get lazy module attributes, loading the example video on first use."""
+    if name == "EXAMPLE_VIDEO":
+        return get_images()
+    if name == "EXAMPLE_FRAME_LIST":
+        return list(get_images().values)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
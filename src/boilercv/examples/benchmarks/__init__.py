@@ -0,0 +1,18 @@
+"""Benchmarks of pipeline stages on example videos."""
+
+from collections.abc import Callable
+from time import perf_counter
+from typing import Any
+
+REPEAT = 3
+"""Number of times to repeat each benchmark."""
+
+
+def get_best_time(func: Callable[..., Any], *args: Any, repeat: int = REPEAT) -> float:
+    """Get the best wall time in seconds over repeated calls of a function."""
+    times: list[float] = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func(*args)
+        times.append(perf_counter() - start)
+    return min(times)
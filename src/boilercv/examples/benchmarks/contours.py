@@ -0,0 +1,59 @@
+"""Benchmark building the contours dataframe for a full example video.
+
+Compares `get_all_contours` with the previous approach, which inserted frame and contour
+numbers into each contour and stacked the results frame-by-frame.
+"""
+
+from cv2 import CHAIN_APPROX_SIMPLE
+from loguru import logger
+from numpy import empty, insert, vstack
+from pandas import DataFrame
+
+from boilercv.data.sets import get_scaled_video
+from boilercv.examples import EXAMPLE_VIDEO_NAME
+from boilercv.examples.benchmarks import get_best_time
+from boilercv.images.cv import find_contours
+from boilercv.stages.find_contours import get_all_contours
+from boilercv.types import DF, Vid
+
+
+def main():
+    video = get_scaled_video(EXAMPLE_VIDEO_NAME, invert=True)
+    num_frames = len(video)
+    logger.info(
+        f"Benchmarking contours for {num_frames} frames of {EXAMPLE_VIDEO_NAME}"
+    )
+    for func in (find_all_contours, get_all_contours, get_all_contours_stacked):
+        time = get_best_time(func, video, CHAIN_APPROX_SIMPLE)
+        logger.info(f"{func.__name__}: {time:.2f} s, {num_frames / time:.0f} frames/s")
+
+
+def find_all_contours(video: Vid, method):
+    """Find contours without building a dataframe, as a lower bound."""
+    return [find_contours(image, method) for image in video]
+
+
+def get_all_contours_stacked(video: Vid, method) -> DF:
+    """Get all contours in a video using the previous approach."""
+    try:
+        all_contours = vstack([
+            insert(
+                axis=1,
+                obj=0,
+                values=frame_num,
+                arr=vstack([
+                    insert(axis=1, obj=0, values=cont_num, arr=contour)
+                    for cont_num, contour in enumerate(find_contours(image, method))
+                ]),
+            )
+            for frame_num, image in enumerate(video)
+        ])
+    except ValueError:
+        all_contours = empty((0, 4))
+    return DataFrame(
+        all_contours, columns=["frame", "contour", "ypx", "xpx"]
+    ).set_index(["frame", "contour"])
+
+
+if __name__ == "__main__":
+    main()
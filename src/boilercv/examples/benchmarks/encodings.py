@@ -0,0 +1,71 @@
+"""Benchmark encoding policies for packed videos.
+
+Compares file size, write throughput, and random-frame read latency of each policy in
+`ENCODINGS`, as well as the previous encoding, which compressed the whole video as a
+single chunk.
+"""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from loguru import logger
+from numpy.random import default_rng
+from pandas import DataFrame
+from xarray import open_dataset
+
+from boilercv.data import FRAME, VIDEO
+from boilercv.data.encodings import ENCODINGS, UNCOMPRESSED, Encoding
+from boilercv.data.sets import get_stage, save_dataset
+from boilercv.examples import EXAMPLE_VIDEO_NAME
+from boilercv.examples.benchmarks import get_best_time
+from boilercv.types import DS
+
+NUM_READS = 50
+"""Number of random frames to read from each encoded video."""
+
+
+def main():
+    source, _ = get_stage(EXAMPLE_VIDEO_NAME)
+    with open_dataset(source) as ds:
+        ds = ds.load()
+    mb = ds[VIDEO].nbytes / 2**20
+    logger.info(f"Benchmarking encodings for {mb:.1f} MB of {EXAMPLE_VIDEO_NAME}")
+    policies = {"uncompressed": UNCOMPRESSED, **ENCODINGS}
+    results: dict[str, dict[str, float]] = {}
+    with TemporaryDirectory() as tmp:
+        for name, encoding in policies.items():
+            results[name] = benchmark(ds, Path(tmp) / f"{name}.nc", encoding)
+        results["zlib, unchunked"] = benchmark(
+            ds, Path(tmp) / "unchunked.nc", {"zlib": True}
+        )
+    logger.info(f"\n{DataFrame(results).T.round(2).to_string()}")
+
+
+def benchmark(ds: DS, path: Path, encoding: Encoding | dict[str, bool]):
+    """Benchmark writing a dataset with an encoding and reading random frames."""
+    mb = ds[VIDEO].nbytes / 2**20
+    if isinstance(encoding, Encoding):
+        write_time = get_best_time(save_dataset, ds, path, encoding)
+    else:
+        write_time = get_best_time(
+            lambda: ds.to_netcdf(path=path, encoding={VIDEO: encoding})
+        )
+    frames = default_rng(0).integers(ds.sizes[FRAME], size=NUM_READS)
+    read_time = get_best_time(read_frames, path, frames)
+    return {
+        "size (MB)": path.stat().st_size / 2**20,
+        "ratio": mb / (path.stat().st_size / 2**20),
+        "write (MB/s)": mb / write_time,
+        "read (ms/frame)": 1000 * read_time / NUM_READS,
+    }
+
+
+def read_frames(path: Path, frames):
+    """Read frames one at a time, as in random access."""
+    with open_dataset(path) as ds:
+        for frame in frames:
+            ds[VIDEO].isel({FRAME: frame}).values  # noqa: B018
+
+
+if __name__ == "__main__":
+    main()
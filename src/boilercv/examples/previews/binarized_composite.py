@@ -12,8 +12,8 @@ from boilercv.previews import compose_da
 
 
 def main():
-    source = get_dataset(_EXAMPLE, _NUM_FRAMES, stage="sources")[VIDEO]
-    bubbles = get_dataset(_EXAMPLE, _NUM_FRAMES, stage="filled")[VIDEO]
+    source = get_dataset(_EXAMPLE, _NUM_FRAMES, stage="sources", cache=True)[VIDEO]
+    bubbles = get_dataset(_EXAMPLE, _NUM_FRAMES, stage="filled", cache=True)[VIDEO]
     highlighted_bubbles = compose_da(source, scale_bool(bubbles)).transpose(
         "frame", "ypx", "xpx", "channel"
     )
@@ -13,7 +13,7 @@ from boilercv.previews import compose_da
 
 def main():
     gray_source = get_dataset(_EXAMPLE, _NUM_FRAMES, stage="large_sources")[VIDEO]
-    bubbles = get_dataset(_EXAMPLE, _NUM_FRAMES, stage="filled")[VIDEO]
+    bubbles = get_dataset(_EXAMPLE, _NUM_FRAMES, stage="filled", cache=True)[VIDEO]
     highlighted_bubbles = compose_da(gray_source, scale_bool(bubbles)).transpose(
         "frame", "ypx", "xpx", "channel"
     )
@@ -20,6 +20,8 @@ from numpy import any, histogram, sqrt, where
 from pandas import CategoricalDtype, DataFrame, NamedAgg
 from sparklines import sparklines
 
+from boilercv.data import ALL_FRAMES
+from boilercv.data.sets import LazyVideo, Stage
 from boilercv.experiments import get_exp
 from boilercv.images import scale_bool
 from boilercv.images.cv import Op, Transform, transform
@@ -128,10 +130,41 @@ def gbc(
     return GBC | GroupByCommon(**locals())
 
 
+def plot_composite(
+    name: str,
+    frame: slice = ALL_FRAMES,
+    ax: Axes | None = None,
+    stage: Stage = "filled",
+) -> Axes:
+    """Compose a bit-packed video without unpacking it, and highlight the first frame.
+
+    Args:
+        name: Video name.
+        frame: Slice of frame positions to compose. Default: all.
+        ax: Axes to plot on.
+        stage: Bit-packed pipeline stage of the video.
+    """
+    with LazyVideo(name, stage) as video:
+        first_frame = scale_bool(video[range(len(video))[frame][0]])
+        composite_video = scale_bool(video.get_composite(frame))
+    return plot_first_frame_on_composite(first_frame, composite_video, ax)
+
+
 def plot_composite_da(video: DA, ax: Axes | None = None) -> Axes:
-    """Compose a video-like data array and highlight the first frame."""
-    first_frame = video.sel(frame=0).values
-    composite_video = video.max("frame").values
+    """Compose a video-like data array and highlight the first frame.
+
+    Use `plot_composite` for bit-packed videos that haven't been transformed since they
+    were unpacked, which composes them without unpacking them.
+    """
+    return plot_first_frame_on_composite(
+        video.sel(frame=0).values, video.max("frame").values, ax
+    )
+
+
+def plot_first_frame_on_composite(
+    first_frame: Img, composite_video: Img, ax: Axes | None = None
+) -> Axes:
+    """Plot the first frame of a video over a composite of its frames."""
     with bounded_ax(composite_video, ax) as ax:
         ax.imshow(~first_frame, alpha=0.6)
         ax.imshow(~composite_video, alpha=0.2)
@@ -3,9 +3,9 @@
 # * Pure numpy image processing functions take lots of types, including DataArrays.
 # pyright: reportGeneralTypeIssues=none
 
+from functools import cache
 from typing import Any
 
-from matplotlib.font_manager import FontProperties, findfont
 from numpy import asarray, iinfo, invert, mean, uint8
 from numpy.typing import DTypeLike
 from PIL import Image, ImageDraw, ImageFont, ImageOps
@@ -50,10 +50,27 @@ def scale_bool(img: Any, dtype: DTypeLike = uint8) -> Any:
 # * -------------------------------------------------------------------------------- * #
 # * OTHER - NOT ALWAYS TYPE PRESERVING
 
-FONT = ImageFont.truetype(findfont(FontProperties(family="dejavu sans")), 24)
 PAD = 10
 
 
+@cache
+def get_font() -> ImageFont.FreeTypeFont:
+    """Get the font for drawing text, loading it on first use.
+
+    Finding fonts with `matplotlib` is slow, so it isn't done on import.
+    """
+    from matplotlib.font_manager import FontProperties, findfont  # noqa: PLC0415
+
+    return ImageFont.truetype(findfont(FontProperties(family="dejavu sans")), 24)
+
+
+def __getattr__(name: str) -> Any:
+    """Get lazy module attributes."""
+    if name == "FONT":
+        return get_font()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def draw_text(image: Img, text: str = "") -> ImgLike:
     """Draw text in the top-right corner of an image.
 
@@ -69,13 +86,14 @@ def draw_text(image: Img, text: str = "") -> ImgLike:
         font_fill = WHITE
     _, image_width = image.shape[:2]
     pil_image = Image.fromarray(image)
-    _, _, font_bbox_width, font_bbox_height = FONT.getbbox(text)
+    font = get_font()
+    _, _, font_bbox_width, font_bbox_height = font.getbbox(text)
     text_p0 = (image_width - PAD - font_bbox_width, PAD)
     p0 = (text_p0[0] - PAD, text_p0[1] - PAD)
     p1 = (text_p0[0] + PAD + font_bbox_width, text_p0[1] + PAD + font_bbox_height)
     draw = ImageDraw.Draw(pil_image)
     draw.rectangle((p0, p1), fill=rectangle_fill)  # type: ignore  # pyright 1.1.348, pillow 10.2.0
-    draw.text(text_p0, text, font=FONT, fill=font_fill)  # type: ignore  # pyright 1.1.348, pillow 10.2.0
+    draw.text(text_p0, text, font=font, fill=font_fill)  # type: ignore  # pyright 1.1.348, pillow 10.2.0
     return asarray(pil_image)
 
 
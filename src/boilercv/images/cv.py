@@ -1,6 +1,10 @@
 from collections.abc import Sequence
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass
 from enum import Enum
+from functools import cache
+from threading import local
 
 from cv2 import (
     ADAPTIVE_THRESH_MEAN_C,
@@ -35,11 +39,26 @@ from cv2 import (
     getStructuringElement,
     morphologyEx,
 )
-from numpy import array, flip, fliplr, iinfo, zeros_like
+from numpy import (
+    array,
+    empty,
+    empty_like,
+    flip,
+    fliplr,
+    iinfo,
+    packbits,
+    uint8,
+    zeros,
+    zeros_like,
+)
 
+from boilercv import WORKERS, check_contrib
 from boilercv.colors import WHITE, WHITE3
 from boilercv.images import unpad
-from boilercv.types import ArrFloat, ArrInt, Img, ImgBool
+from boilercv.instrument import instrument
+from boilercv.types import ArrFloat, ArrInt, Img, ImgBool, Vid, VidBool
+
+check_contrib()
 
 
 def convert_image(img: Img, code: int | None = None) -> Img:
@@ -78,6 +97,73 @@ def binarize(img: Img, block_size: int = 11, thresh_dist_from_mean: int = 2) ->
     ).astype(bool)
 
 
+@instrument
+def binarize_video(
+    video: Vid,
+    mask: Img | None = None,
+    packed: bool = False,
+    out: Vid | VidBool | None = None,
+    executor: Executor | None = None,
+    block_size: int = 11,
+    thresh_dist_from_mean: int = 2,
+) -> Vid | VidBool:
+    """Binarize each frame of a video with an adaptive threshold.
+
+    Frames are thresholded directly into the output, optionally after masking them and
+    before packing their bits, so each frame is handled in a single pass.
+
+    Args:
+        video: Video with dims (frame, y, x).
+        mask: Mask to apply to each frame before binarizing, as in `apply_mask`.
+        packed: Whether to pack bits along the last dimension, as in `pack`.
+        out: Destination for the binarized video.
+        executor: Pool of threads to binarize frames in parallel. OpenCV releases the
+            GIL, so threads run concurrently. A pool of `WORKERS` threads is used if not
+            given.
+        block_size: Size of the neighborhood used to find each threshold.
+        thresh_dist_from_mean: Distance below the neighborhood mean of each threshold.
+
+    Returns:
+        Binarized video, packed if requested.
+    """
+    block_size += 1 if block_size % 2 == 0 else 0
+    num_frames, height, width = video.shape
+    if out is None:
+        out = (
+            empty((num_frames, height, -(-width // 8)), dtype=uint8)
+            if packed
+            else empty(video.shape, dtype=bool)
+        )
+    inverted_mask = None if mask is None else bitwise_not(mask)
+    scratch = local()
+
+    def binarize_frame(frame: int):
+        img = video[frame]
+        if not hasattr(scratch, "masked"):
+            scratch.masked = empty_like(img)
+            scratch.binarized = empty(img.shape, dtype=uint8)
+        if inverted_mask is not None:
+            img = add(img, inverted_mask, dst=scratch.masked)
+        # Thresholding to ones writes valid booleans straight into unpacked output
+        binarized = scratch.binarized if packed else out[frame].view(uint8)
+        adaptiveThreshold(
+            src=img,
+            maxValue=1,
+            adaptiveMethod=ADAPTIVE_THRESH_MEAN_C,
+            thresholdType=THRESH_BINARY,
+            blockSize=block_size,
+            C=thresh_dist_from_mean,
+            dst=binarized,
+        )
+        if packed:
+            out[frame] = packbits(binarized, axis=-1)
+
+    with nullcontext(executor) if executor else ThreadPoolExecutor(WORKERS) as pool:
+        for _ in pool.map(binarize_frame, range(num_frames)):
+            pass
+    return out
+
+
 def flood(img: Img) -> ImgBool:
     """Flood the image, returning the resulting flood as a bright mask."""
     seed_point = array(img.shape) // 2
@@ -98,12 +184,12 @@ def flood(img: Img) -> ImgBool:
 
 def close_and_erode(img: Img) -> Img:
     """Close holes, then erode."""
-    return transform(img, [Transform(Op.close, 4), Transform(Op.erode, 9)]).astype(bool)
+    return CLOSE_AND_ERODE(img).astype(bool)
 
 
 def get_wall(roi: Img) -> Img:
     """Dilate the ROI to get the wall."""
-    return transform(roi, Transform(Op.dilate, 9)).astype(bool)
+    return DILATE_WALL(roi).astype(bool)
 
 
 class Op(Enum):
@@ -122,7 +208,7 @@ class Op(Enum):
     top_hat = MORPH_TOPHAT
 
 
-@dataclass
+@dataclass(frozen=True)
 class Transform:
     """A morphological transform."""
 
@@ -132,19 +218,112 @@ class Transform:
     """The elliptical kernel size."""
 
 
+@cache
+def get_kernel(size: int) -> Img:
+    """Get an elliptical structuring element, built once for each size."""
+    kernel = getStructuringElement(MORPH_ELLIPSE, [size] * 2)
+    kernel.flags.writeable = False
+    return kernel  # type: ignore  # pyright 1.1.333
+
+
+class TransformPipeline:
+    """Morphological transforms compiled for repeated application to images.
+
+    Kernels are built once, and each thread pads images into its own preallocated
+    scratch buffers, reused across calls for images of the same shape and type.
+
+    Args:
+        transforms: Transforms to apply in order.
+    """
+
+    def __init__(self, transforms: Transform | Sequence[Transform]):
+        self.transforms = (
+            [transforms] if isinstance(transforms, Transform) else list(transforms)
+        )
+        """Transforms to apply in order."""
+        self.pad_width = max(transform.size for transform in self.transforms)
+        """Width of padding around images."""
+        self.kernels = [get_kernel(transform.size) for transform in self.transforms]
+        """Structuring element for each transform."""
+        self._local = local()
+
+    def __call__(self, img: Img, out: Img | None = None) -> Img:
+        """Apply transforms to an image with a dark background.
+
+        Args:
+            img: Image to transform.
+            out: Destination for the transformed image. May be `img` itself.
+
+        Returns:
+            Transformed image.
+        """
+        src, dst = self._get_scratch(img)
+        p = self.pad_width
+        # Explicitly pad out the image since cv2.morphologyEx boundary handling is weird
+        src[:p], src[-p:], src[:, :p], src[:, -p:] = 0, 0, 0, 0
+        src[p:-p, p:-p] = img
+        for transform, kernel in zip(self.transforms, self.kernels, strict=True):
+            morphologyEx(src=src, op=transform.op.value, kernel=kernel, dst=dst)
+            src, dst = dst, src
+        out = empty_like(img) if out is None else out
+        out[...] = src[p:-p, p:-p]
+        return out
+
+    def apply(
+        self, video: Vid, out: Vid | None = None, executor: Executor | None = None
+    ) -> Vid:
+        """Apply transforms to each frame of a video.
+
+        Args:
+            video: Video with dims (frame, y, x).
+            out: Destination for the transformed video. May be `video` itself, to
+                transform it in place.
+            executor: Pool of threads to transform frames in parallel. OpenCV releases
+                the GIL, so threads run concurrently. Frames are transformed in turn if
+                not given.
+
+        Returns:
+            Transformed video.
+        """
+        out = empty_like(video) if out is None else out
+        if executor is None:
+            for frame, img in zip(out, video, strict=True):
+                self(img, frame)
+        else:
+            for _ in executor.map(self, video, out):
+                pass
+        return out
+
+    def _get_scratch(self, img: Img) -> list[Img]:
+        """Get padded scratch buffers for this thread."""
+        key = (img.shape, img.dtype)
+        if getattr(self._local, "key", None) != key:
+            # Only pad rows and columns, not channels
+            shape = [
+                *(dim + 2 * self.pad_width for dim in img.shape[:2]),
+                *img.shape[2:],
+            ]
+            self._local.key = key
+            self._local.scratch = [zeros(shape, img.dtype), empty(shape, img.dtype)]
+        return self._local.scratch
+
+
+@cache
+def get_pipeline(transforms: tuple[Transform, ...]) -> TransformPipeline:
+    """Get a compiled pipeline of transforms, compiling it once for each sequence."""
+    return TransformPipeline(transforms)
+
+
 def transform(img: Img, transforms: Transform | Sequence[Transform]) -> Img:
     """Apply morphological transforms to an image with a dark background."""
     transforms = [transforms] if isinstance(transforms, Transform) else transforms
-    pad_width = max(transform.size for transform in transforms)
-    # Explicitly pad out the image since cv2.morphologyEx boundary handling is weird
-    img = pad(img, pad_width, value=0)
-    for transform in transforms:
-        img = morphologyEx(  # type: ignore  # pyright 1.1.333
-            src=img,
-            op=transform.op.value,
-            kernel=getStructuringElement(MORPH_ELLIPSE, [transform.size] * 2),
-        )
-    return unpad(img, pad_width)
+    return get_pipeline(tuple(transforms))(img)
+
+
+CLOSE_AND_ERODE = TransformPipeline([Transform(Op.close, 4), Transform(Op.erode, 9)])
+"""Close holes, then erode."""
+DILATE_WALL = TransformPipeline(Transform(Op.dilate, 9))
+"""Dilate the ROI to get the wall."""
 
 
 def build_mask_from_polygons(img: Img, contours: Sequence[ArrInt]) -> Img:
@@ -0,0 +1,282 @@
+"""Instrumentation of pipeline stages, recording where time, I/O, and memory go.
+
+Measurements are totaled by name and by the video being processed. Only stages and the
+steps they take once per video are instrumented, not helpers called for every frame, so
+instrumentation costs little next to the work it measures. Measurements taken in worker
+processes are sent back with their results by `boilercv.data.sets`. Disable
+instrumentation by setting `BOILERCV_INSTRUMENT` to "false".
+"""
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from functools import partial, wraps
+from inspect import signature
+from os import getpid
+from pathlib import Path
+from sys import platform
+from threading import Lock
+from time import perf_counter, process_time
+from typing import TYPE_CHECKING, Any, ParamSpec, TypeVar
+
+from boilercv import INSTRUMENT
+
+# `pandas` and `psutil` are imported when needed, as this is imported by every stage
+if TYPE_CHECKING:
+    from psutil import Process
+
+    from boilercv.types import DF
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+MEASUREMENT_COLS = [
+    "name",
+    "video",
+    "calls",
+    "wall_s",
+    "cpu_s",
+    "read_bytes",
+    "write_bytes",
+    "peak_rss_growth_mb",
+]
+"""Columns of instrumentation reports."""
+
+
+@dataclass
+class Measurement:
+    """Totals of measurements of a named piece of work on a video."""
+
+    name: str
+    """Name of the work measured, such as a stage or function."""
+    video: str = ""
+    """Video being processed, if any."""
+    calls: int = 0
+    """Number of times the work was measured."""
+    wall_s: float = 0
+    """Total wall time."""
+    cpu_s: float = 0
+    """Total CPU time of the process, across all of its threads."""
+    read_bytes: int = 0
+    """Total bytes read by the process, including reads served from the OS cache."""
+    write_bytes: int = 0
+    """Total bytes written by the process."""
+    peak_rss_growth_mb: float = 0
+    """Growth of the peak resident memory of the process during the work, in MB.
+
+    The peak of a process can't be reset, so this is how far the work raised it past the
+    highest it had been before the work started, not the memory the work used alone.
+    """
+
+    def add(self, other: "Measurement"):
+        """Add another measurement of the same work to this one."""
+        self.calls += other.calls
+        self.wall_s += other.wall_s
+        self.cpu_s += other.cpu_s
+        self.read_bytes += other.read_bytes
+        self.write_bytes += other.write_bytes
+        self.peak_rss_growth_mb = max(self.peak_rss_growth_mb, other.peak_rss_growth_mb)
+
+
+MEASUREMENTS: dict[tuple[str, str], Measurement] = {}
+"""Totals of measurements in this process, keyed by name and video."""
+_lock = Lock()
+_video: ContextVar[str] = ContextVar("video", default="")
+_process: "Process | None" = None
+
+
+def record(measurement: Measurement):
+    """Add a measurement to the totals of this process."""
+    key = (measurement.name, measurement.video)
+    with _lock:
+        if total := MEASUREMENTS.get(key):
+            total.add(measurement)
+        else:
+            MEASUREMENTS[key] = measurement
+
+
+def pop_measurements() -> list[Measurement]:
+    """Remove and return all measurements in this process."""
+    with _lock:
+        measurements = list(MEASUREMENTS.values())
+        MEASUREMENTS.clear()
+    return measurements
+
+
+@contextmanager
+def measure(name: str, video: str = "", resources: bool = True) -> Iterator[None]:
+    """Measure the work done in a context.
+
+    Args:
+        name: Name of the work.
+        video: Video being processed. Measurements taken within this context are
+            attributed to it. Default: the video of the enclosing context, if any.
+        resources: Whether to measure I/O and peak memory as well as time. Reading them
+            costs tens of microseconds, so skip them for work done on every frame.
+    """
+    if not INSTRUMENT:
+        yield
+        return
+    token = _video.set(video) if video else None
+    start = _get_resources() if resources else (0, 0, 0.0)
+    start_wall, start_cpu = perf_counter(), process_time()
+    try:
+        yield
+    finally:
+        wall, cpu = perf_counter() - start_wall, process_time() - start_cpu
+        read, write, peak = _get_resources() if resources else (0, 0, 0.0)
+        record(
+            Measurement(
+                name=name,
+                video=_video.get(),
+                calls=1,
+                wall_s=wall,
+                cpu_s=cpu,
+                read_bytes=read - start[0],
+                write_bytes=write - start[1],
+                peak_rss_growth_mb=peak - start[2],
+            )
+        )
+        if token is not None:
+            _video.reset(token)
+
+
+def instrument(
+    func: Callable[P, R] | None = None,
+    *,
+    video: str | None = None,
+    resources: bool = False,
+) -> Any:
+    """Measure each call of a function, as in `measure`.
+
+    Use as a bare decorator, or with arguments. Functions are returned as-is when
+    instrumentation is disabled.
+
+    Args:
+        func: Function to instrument.
+        video: Name of the parameter holding the video name, if any.
+        resources: Whether to measure I/O and peak memory as well as time.
+    """
+    if func is None:
+        return partial(instrument, video=video, resources=resources)
+    if not INSTRUMENT:
+        return func
+    name = get_name(func)
+    sig = signature(func)
+
+    @wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        if video is None and not resources:
+            start_wall, start_cpu = perf_counter(), process_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(
+                    Measurement(
+                        name=name,
+                        video=_video.get(),
+                        calls=1,
+                        wall_s=perf_counter() - start_wall,
+                        cpu_s=process_time() - start_cpu,
+                    )
+                )
+        video_name = (
+            str(sig.bind(*args, **kwargs).arguments.get(video, "")) if video else ""
+        )
+        with measure(name, video_name, resources):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def call_measured(
+    func: Callable[..., R], video: str, *args: Any
+) -> tuple[R, list[Measurement]]:
+    """Call a function on a video in a worker, returning measurements with the result."""
+    pop_measurements()
+    with measure(get_name(func), video):
+        result = func(*args)
+    return result, pop_measurements()
+
+
+def stage(func: Callable[P, R]) -> Callable[P, R]:
+    """Measure a pipeline stage, writing a report of its measurements when it ends.
+
+    Reports go to the instrumentation directory, named after the file of the stage, which
+    is also the name of the stage in `dvc.yaml`.
+    """
+    if not INSTRUMENT:
+        return func
+    name = Path(func.__code__.co_filename).stem
+
+    @wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        from boilercv.models.params import PARAMS  # noqa: PLC0415
+
+        pop_measurements()
+        try:
+            with measure(name):
+                return func(*args, **kwargs)
+        finally:
+            write_report(PARAMS.paths.instrumentation / f"{name}.json")
+
+    return wrapper
+
+
+def get_report(measurements: list[Measurement] | None = None) -> "DF":
+    """Get a table of measurements, sorted by wall time.
+
+    Args:
+        measurements: Measurements to report. Default: those of this process.
+    """
+    from pandas import DataFrame  # noqa: PLC0415
+
+    if measurements is None:
+        with _lock:
+            measurements = list(MEASUREMENTS.values())
+    return (
+        DataFrame([asdict(m) for m in measurements], columns=MEASUREMENT_COLS)
+        .sort_values("wall_s", ascending=False)
+        .reset_index(drop=True)
+    )
+
+
+def write_report(path: Path):
+    """Write a report of the measurements of this process as JSON records."""
+    get_report().to_json(path, orient="records", indent=2)
+
+
+def get_name(func: Callable[..., Any]) -> str:
+    """Get the qualified name of a function, looking through partials."""
+    while isinstance(func, partial):
+        func = func.func
+    name = getattr(func, "__qualname__", type(func).__qualname__)
+    return f"{func.__module__}.{name}"
+
+
+def _get_resources() -> tuple[int, int, float]:
+    """Get bytes read and written by this process, and its peak resident memory in MB."""
+    from psutil import Process  # noqa: PLC0415
+
+    global _process  # noqa: PLW0603
+    if _process is None or _process.pid != getpid():
+        _process = Process()
+    read = write = 0
+    # Not available on macOS
+    if hasattr(_process, "io_counters"):
+        io = _process.io_counters()
+        # Linux counts reads served from the OS cache apart from reads from disk
+        read = getattr(io, "read_chars", io.read_bytes)
+        write = getattr(io, "write_chars", io.write_bytes)
+    if platform == "win32":
+        peak = _process.memory_info().peak_wset
+    elif platform == "darwin":
+        from resource import RUSAGE_SELF, getrusage  # noqa: PLC0415
+
+        peak = getrusage(RUSAGE_SELF).ru_maxrss
+    else:
+        # Unlike `ru_maxrss`, doesn't include the peak of the process that started this one
+        status = Path("/proc/self/status").read_text(encoding="utf-8")
+        peak = int(status.split("VmHWM:")[1].split()[0]) * 2**10
+    return read, write, peak / 2**20
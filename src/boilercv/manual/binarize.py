@@ -1,43 +1,171 @@
 """Binarize all videos and export their ROIs."""
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, reduce
+from pathlib import Path
+
 from loguru import logger
+from numpy import empty, maximum, uint8
 from tqdm import tqdm
 from xarray import open_dataset
 
-from boilercv.data import FRAME, ROI, VIDEO, apply_to_img_da
-from boilercv.data.packing import pack
+from boilercv import SHARD_SIZE, WORKERS
+from boilercv.data import FRAME, PACKED_DIMS, ROI, VIDEO, XPX, YPX, apply_to_img_da
+from boilercv.data.chunks import (
+    CHUNK_SIZE,
+    get_chunked_max,
+    get_chunks,
+    read_frames,
+    stream_video,
+    write_frames,
+)
+from boilercv.data.pipeline import pipeline, prefetch
+from boilercv.data.sets import map_shards_in_parallel
 from boilercv.images import scale_bool
-from boilercv.images.cv import apply_mask, binarize, close_and_erode, flood
+from boilercv.images.cv import binarize_video, close_and_erode, flood
 from boilercv.models.params import PARAMS
 from boilercv.models.paths import get_sorted_paths
-from boilercv.types import DA
+from boilercv.types import DA, DS, ArrInt, Img
 
 
-def main():
+def main(
+    chunk_size: int = CHUNK_SIZE,
+    shard_size: int = SHARD_SIZE,
+    workers: int | None = WORKERS,
+):
     logger.info("start binarize")
     for source in tqdm(get_sorted_paths(PARAMS.paths.large_sources)):
         destination = PARAMS.paths.sources / f"{source.stem}.nc"
         if destination.exists():
             continue
-        with open_dataset(source) as ds:
-            video = ds[VIDEO]
-            maximum = video.max(FRAME)
-            flooded: DA = apply_to_img_da(flood, maximum)
-            roi: DA = apply_to_img_da(close_and_erode, scale_bool(flooded))
-            masked: DA = apply_to_img_da(
-                apply_mask, video, scale_bool(roi), vectorize=True
-            )
-            binarized: DA = apply_to_img_da(binarize, masked, vectorize=True)
-            ds[VIDEO] = pack(binarized)
-            ds.to_netcdf(
-                path=PARAMS.paths.sources / source.name,
-                encoding={VIDEO: {"zlib": True}},
-            )
-            ds[ROI] = roi
-            ds = ds.drop_vars(VIDEO)
-            ds.to_netcdf(path=PARAMS.paths.rois / source.name)
+        binarize_sharded(
+            source,
+            destination,
+            PARAMS.paths.rois / source.name,
+            chunk_size,
+            shard_size,
+            workers,
+        )
     logger.info("finish binarize")
 
 
+def binarize_chunked(
+    ds: DS, destination: Path, roi_destination: Path, chunk_size: int = CHUNK_SIZE
+):
+    """Binarize a video and export its ROI, holding only a few chunks of frames at once.
+
+    The maximum over all frames is found in a first pass to get the ROI. In a second
+    pass, each chunk of frames is masked, binarized, and packed in a single pass over
+    its frames in a pool of threads. Meanwhile, the next chunk is read and the previous
+    one written in the background, as in `boilercv.data.pipeline`.
+
+    Args:
+        ds: Grayscale video dataset, preferably opened lazily.
+        destination: Destination for the binarized video.
+        roi_destination: Destination for the ROI.
+        chunk_size: Number of frames in each chunk.
+    """
+    video = ds[VIDEO]
+    roi = get_roi(get_chunked_max(video, chunk_size))
+    mask = scale_bool(roi)
+    num_frames = video.sizes[FRAME]
+    shape = (num_frames, video.sizes[YPX], -(-video.sizes[XPX] // 8))
+    with (
+        stream_video(destination, ds, PACKED_DIMS, shape, attrs=video.attrs) as packed,
+        ThreadPoolExecutor(WORKERS) as executor,
+    ):
+        pipeline(
+            get_chunks(num_frames, chunk_size),
+            read=partial(read_frames, video),
+            compute=lambda _, frames: binarize_video(
+                frames.values, mask.values, packed=True, executor=executor
+            ),
+            write=partial(write_frames, packed),
+        )
+    ds[ROI] = roi
+    ds.drop_vars(VIDEO).to_netcdf(path=roi_destination)
+
+
+def binarize_sharded(
+    source: Path,
+    destination: Path,
+    roi_destination: Path,
+    chunk_size: int = CHUNK_SIZE,
+    shard_size: int = SHARD_SIZE,
+    workers: int | None = WORKERS,
+):
+    """Binarize a video and export its ROI, splitting its frames across workers.
+
+    As in `binarize_chunked`, but each pass is split into shards of frames, each read
+    from the source by a worker process. The maxima of all shards give the ROI, and
+    binarized shards are written to disk in frame order as they finish.
+
+    Args:
+        source: Grayscale video.
+        destination: Destination for the binarized video.
+        roi_destination: Destination for the ROI.
+        chunk_size: Number of frames each worker holds in memory at once.
+        shard_size: Number of frames in each shard.
+        workers: Number of worker processes. Default: number of processors.
+    """
+    name = str(source)
+    with open_dataset(source) as ds:
+        video = ds[VIDEO]
+        num_frames = video.sizes[FRAME]
+        shard_maxima = [
+            shard_max
+            for *_, shard_max in map_shards_in_parallel(
+                partial(get_shard_max, chunk_size),
+                {name: num_frames},
+                shard_size,
+                workers,
+            )
+        ]
+        roi = get_roi(reduce(maximum, shard_maxima))
+        shape = (num_frames, video.sizes[YPX], -(-video.sizes[XPX] // 8))
+        with stream_video(
+            destination, ds, PACKED_DIMS, shape, attrs=video.attrs
+        ) as packed:
+            for _, shard, packed_shard in map_shards_in_parallel(
+                partial(binarize_shard, scale_bool(roi).values, chunk_size),
+                {name: num_frames},
+                shard_size,
+                workers,
+            ):
+                packed[shard] = packed_shard
+        ds[ROI] = roi
+        ds.drop_vars(VIDEO).to_netcdf(path=roi_destination)
+
+
+def get_shard_max(chunk_size: int, source: str, shard: slice) -> DA:
+    """Get the maximum along frames of a shard of a video."""
+    with open_dataset(source) as ds:
+        return get_chunked_max(ds[VIDEO].isel({FRAME: shard}), chunk_size).load()
+
+
+def binarize_shard(mask: Img, chunk_size: int, source: str, shard: slice) -> ArrInt:
+    """Binarize and pack a shard of a video, reading the next chunk in the background.
+
+    Frames are binarized in turn, as other workers binarize other shards at once.
+    """
+    with open_dataset(source) as ds:
+        video = ds[VIDEO].isel({FRAME: shard})
+        num_frames = video.sizes[FRAME]
+        packed = empty(
+            (num_frames, video.sizes[YPX], -(-video.sizes[XPX] // 8)), dtype=uint8
+        )
+        for chunk, frames in prefetch(
+            partial(read_frames, video), get_chunks(num_frames, chunk_size)
+        ):
+            binarize_video(frames.values, mask, packed=True, out=packed[chunk])
+    return packed
+
+
+def get_roi(video_max: DA) -> DA:
+    """Get the ROI of a video from its maximum along frames."""
+    flooded: DA = apply_to_img_da(flood, video_max)
+    return apply_to_img_da(close_and_erode, scale_bool(flooded))
+
+
 if __name__ == "__main__":
     main()
@@ -5,27 +5,34 @@ from datetime import datetime
 from pathlib import Path
 
 from loguru import logger
-from tqdm import tqdm
 
-from boilercv.data.video import prepare_dataset
+from boilercv import WORKERS
+from boilercv.data.sets import process_in_parallel
+from boilercv.data.video import convert_cine
 from boilercv.models.params import PARAMS
 from boilercv.models.paths import get_sorted_paths
 
 
-def main():
+def main(workers: int | None = WORKERS):
     logger.info("start convert")
-    for source in tqdm(get_sorted_paths(PARAMS.paths.cines)):
+    destinations: dict[str, Path] = {}
+    for source in get_sorted_paths(PARAMS.paths.cines):
         if dt := get_datetime_from_cine(source):
             destination_stem = dt.isoformat().replace(":", "-")
         else:
             destination_stem = source.stem
         destination = PARAMS.paths.large_sources / f"{destination_stem}.nc"
-        if destination.exists():
-            continue
-        prepare_dataset(source).to_netcdf(path=destination)
+        if not destination.exists():
+            destinations[str(source)] = destination
+    process_in_parallel(convert, destinations, workers)
     logger.info("finish convert")
 
 
+def convert(source: str, destination: Path):
+    """Convert a CINE, streaming its images to disk."""
+    convert_cine(Path(source), destination)
+
+
 def get_datetime_from_cine(path: Path) -> datetime | None:
     """Get datetime from a cine named by Phantom Cine Viewer's {timeS} scheme."""
     with contextlib.suppress(ValueError):
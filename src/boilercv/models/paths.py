@@ -41,6 +41,7 @@ class Paths(CreatePathsModel):
     # * Local results
     docx: DirectoryPath = data / "docx"
     html: DirectoryPath = data / "html"
+    instrumentation: DirectoryPath = data / "instrumentation"
     md: DirectoryPath = data / "md"
     media: DirectoryPath = data / "media"
 
@@ -1,10 +1,250 @@
 """Bubble lifetimes compared with theoretical correlations."""
 
+from collections.abc import Callable
+from datetime import datetime
+from inspect import getmembers, isfunction, signature
+from pathlib import Path
+from typing import Any
+
+from boilercore.paths import ISOLIKE, dt_fromisolike
+from numpy import (
+    asarray,
+    bincount,
+    cumsum,
+    errstate,
+    flatnonzero,
+    hypot,
+    interp,
+    lexsort,
+    nan,
+    r_,
+    where,
+    zeros,
+)
+from pandas import DataFrame, Index, concat, read_hdf
+
+from boilercv import correlations
+from boilercv.correlations import (
+    fourier,
+    jakob,
+    kinematic_viscosity,
+    prandtl,
+    reynolds,
+    thermal_diffusivity,
+)
+from boilercv.instrument import stage
 from boilercv.models.params import PARAMS
+from boilercv.types import DF
+
+SUBCOOLING = "subcooling"
+"""Column of liquid subcooling of each trial, in K."""
+TRIAL = "trial"
+"""Column of the trial each track belongs to."""
+CORRELATION_PREFIX = "dimensionless_bubble_diameter_"
+"""Prefix of correlations in `boilercv.correlations` to compare with."""
+LIQUID_PROPERTIES = DataFrame(
+    index=Index(range(0, 55, 5), dtype=float, name=SUBCOOLING),
+    columns=[
+        "density",  # kg/m^3
+        "dynamic_viscosity",  # Pa-s
+        "isobaric_specific_heat",  # J/kg-K
+        "thermal_conductivity",  # W/m-K
+    ],
+    data=[
+        (958, 2.82e-4, 4216, 0.679),
+        (962, 2.97e-4, 4211, 0.677),
+        (965, 3.15e-4, 4205, 0.675),
+        (969, 3.34e-4, 4201, 0.673),
+        (972, 3.54e-4, 4197, 0.670),
+        (975, 3.78e-4, 4193, 0.667),
+        (978, 4.04e-4, 4190, 0.663),
+        (981, 4.33e-4, 4187, 0.659),
+        (983, 4.66e-4, 4185, 0.654),
+        (986, 5.04e-4, 4183, 0.649),
+        (988, 5.47e-4, 4181, 0.643),
+    ],
+)
+"""Properties of liquid water at atmospheric pressure, indexed by subcooling in K.
 
+Rounded from the IAPWS formulations for water, as tabulated at 101.325 kPa in the NIST
+Chemistry WebBook, SRD 69, "Thermophysical Properties of Fluid Systems".
+"""
+LATENT_HEAT_OF_VAPORIZATION = 2.23e6  # J/kg
+"""Latent heat of vaporization of water at saturation, as in the `plot_tracks` notebook."""
+VAPOR_DENSITY = 0.804  # kg/m^3
+"""Density of saturated water vapor, as in the `plot_tracks` notebook."""
 
+
+@stage
 def main():
-    (PARAMS.paths.lifetimes / "theory").touch()
+    # Experiment modules import plotting libraries, which most stages don't need
+    from boilercv.experiments.e230920_subcool import THERMAL_DATA  # noqa: PLC0415
+
+    compare_theory(get_tracks(PARAMS.paths.tracks, THERMAL_DATA)).to_parquet(
+        PARAMS.paths.lifetimes / "theory.parquet", index=False
+    )
+
+
+def get_tracks(directory: Path, thermal_data: Path) -> DF:
+    """Get tracks from all track tables in a directory, labeled by trial.
+
+    Track tables are named after the time of their trial, and the subcooling of each
+    trial is looked up at that time in the thermal data.
+
+    Raises:
+        FileNotFoundError: If there are no track tables in the directory.
+
+    Args:
+        directory: Directory of track tables.
+        thermal_data: Thermal data with a "subcool" column in K, indexed by time.
+    """
+    if not (paths := sorted(directory.glob("*.h5"))):
+        raise FileNotFoundError(f"No track tables found in {directory}.")
+    subcooling = read_hdf(thermal_data).subcool  # type: ignore  # pyright 1.1.333
+    return concat(
+        [
+            read_hdf(path).assign(**{  # type: ignore  # pyright 1.1.333
+                TRIAL: path.stem,
+                SUBCOOLING: subcooling[get_trial_time(path.stem)],
+            })
+            for path in paths
+        ],
+        ignore_index=True,
+    )
+
+
+def get_trial_time(trial: str) -> datetime:
+    """Get the time of a trial from its name."""
+    if not (match := ISOLIKE.search(trial)):
+        raise ValueError(f"No time in the name of trial {trial}.")
+    return dt_fromisolike(match)
+
+
+def get_correlations() -> dict[str, Callable[..., Any]]:
+    """Get dimensionless bubble diameter correlations, keyed by author."""
+    return {
+        name.removeprefix(CORRELATION_PREFIX): func
+        for name, func in getmembers(correlations, isfunction)
+        if name.startswith(CORRELATION_PREFIX)
+    }
+
+
+def get_liquid_properties(subcooling: Any) -> dict[str, Any]:
+    """Interpolate liquid properties at each subcooling.
+
+    Raises:
+        ValueError: If any subcooling is outside the range of tabulated properties.
+    """
+    low, high = LIQUID_PROPERTIES.index[[0, -1]]
+    if ((asarray(subcooling) < low) | (asarray(subcooling) > high)).any():
+        raise ValueError(
+            f"Liquid properties are only tabulated for {low} to {high} K subcooling."
+        )
+    return {
+        prop: interp(subcooling, LIQUID_PROPERTIES.index, values)
+        for prop, values in LIQUID_PROPERTIES.items()
+    }
+
+
+def compare_theory(tracks: DF) -> DF:
+    """Evaluate every correlation for every sample of every bubble track at once.
+
+    Samples are sorted by trial, bubble, and frame, and quantities depending on the
+    start of each track are broadcast back to its samples, so that the dimensionless
+    groups and all correlations are evaluated as whole columns. The initial Reynolds
+    number is based on the initial diameter and the mean speed over the track.
+
+    Args:
+        tracks: Tracks with "bubble", "frame", "time", "diameter", "dy", and "dx"
+            columns in SI units, "subcooling" in K, and optionally "trial", as from
+            `get_tracks`.
+
+    Returns:
+        Samples with their time since the start of their track, measured dimensionless
+        diameter, dimensionless groups, and the dimensionless diameter predicted by each
+        correlation in columns named by author.
+    """
+    trial = (
+        tracks[TRIAL].astype("category").cat.codes.to_numpy()
+        if TRIAL in tracks
+        else zeros(len(tracks), dtype=int)
+    )
+    order = lexsort((tracks["frame"].to_numpy(), tracks["bubble"].to_numpy(), trial))
+    tracks = tracks.iloc[order].reset_index(drop=True)
+    bubble = tracks["bubble"].to_numpy()
+    trial = trial[order]
+    # Number each track, and find samples at the start of each
+    first = (
+        r_[True, (bubble[1:] != bubble[:-1]) | (trial[1:] != trial[:-1])]
+        if len(bubble)
+        else zeros(0, dtype=bool)
+    )
+    group = cumsum(first) - 1
+    starts = flatnonzero(first)
+    counts = bincount(group)
+    time = tracks["time"].to_numpy(dtype=float)
+    diameter = tracks["diameter"].to_numpy(dtype=float)
+    # Tracks starting with a contour enclosing no area have no initial diameter
+    initial_diameter = where(diameter > 0, diameter, nan)[starts][group]
+    # The first sample of each track has no displacement, so it is left out of the mean
+    speed = hypot(
+        tracks["dy"].to_numpy(dtype=float), tracks["dx"].to_numpy(dtype=float)
+    )
+    mean_speed = bincount(group, weights=speed * ~first) / (counts - 1).clip(min=1)
+    subcooling = tracks[SUBCOOLING].to_numpy(dtype=float)
+    liquid = get_liquid_properties(subcooling)
+    groups = {
+        "bubble_initial_reynolds": reynolds(
+            velocity=mean_speed[group],
+            characteristic_length=initial_diameter,
+            kinematic_viscosity=kinematic_viscosity(
+                dynamic_viscosity=liquid["dynamic_viscosity"], density=liquid["density"]
+            ),
+        ),
+        "liquid_prandtl": prandtl(
+            dynamic_viscosity=liquid["dynamic_viscosity"],
+            isobaric_specific_heat=liquid["isobaric_specific_heat"],
+            thermal_conductivity=liquid["thermal_conductivity"],
+        ),
+        "bubble_jakob": jakob(
+            liquid_density=liquid["density"],
+            vapor_density=VAPOR_DENSITY,
+            liquid_isobaric_specific_heat=liquid["isobaric_specific_heat"],
+            subcooling=subcooling,
+            latent_heat_of_vaporization=LATENT_HEAT_OF_VAPORIZATION,
+        ),
+        "bubble_fourier": fourier(
+            liquid_thermal_diffusivity=thermal_diffusivity(
+                thermal_conductivity=liquid["thermal_conductivity"],
+                density=liquid["density"],
+                isobaric_specific_heat=liquid["isobaric_specific_heat"],
+            ),
+            initial_bubble_diameter=initial_diameter,
+            time=time - time[starts][group],
+        ),
+    }
+    args = {
+        **groups,
+        "jakob": groups["bubble_jakob"],
+        "fourier": groups["bubble_fourier"],
+    }
+    # Correlations are undefined past bubble collapse, where they become NaN
+    with errstate(invalid="ignore"):
+        predictions = {
+            name: func(**{param: args[param] for param in signature(func).parameters})
+            for name, func in get_correlations().items()
+        }
+    return DataFrame({
+        **({TRIAL: tracks[TRIAL]} if TRIAL in tracks else {}),
+        "bubble": bubble,
+        "frame": tracks["frame"],
+        "time": time - time[starts][group],
+        SUBCOOLING: subcooling,
+        "initial_diameter": initial_diameter,
+        "dimensionless_bubble_diameter": diameter / initial_diameter,
+        **groups,
+        **predictions,
+    })
 
 
 if __name__ == "__main__":
@@ -1,39 +1,150 @@
 """Fill bubble contours."""
 
+from pathlib import Path
+
+from cv2 import FILLED, drawContours
 from loguru import logger
-from tqdm import tqdm
-from xarray import zeros_like
-
-from boilercv.data import ROI, VIDEO
-from boilercv.data.packing import pack
-from boilercv.data.sets import get_contours_df, get_dataset, process_datasets
-from boilercv.images import scale_bool
-from boilercv.images.cv import draw_contours
+from numpy import (
+    ascontiguousarray,
+    empty,
+    int32,
+    int64,
+    packbits,
+    searchsorted,
+    uint8,
+    unique,
+    zeros,
+)
+from xarray import open_dataset
+
+from boilercv import SHARD_SIZE, WORKERS, colors
+from boilercv.colors import WHITE
+from boilercv.data import PACKED_DIMS, VIDEO, XPX, YPX
+from boilercv.data.contours import DEFAULT_CONTOUR_STORE
+from boilercv.data.manifest import get_source_files, record_processed
+from boilercv.data.pipeline import Writer
+from boilercv.data.sets import (
+    get_contours_df,
+    get_contours_path,
+    get_frame_labels,
+    get_num_frames,
+    get_stage,
+    get_unprocessed_destinations,
+    map_shards_in_parallel,
+    save_dataset,
+)
+from boilercv.instrument import stage
 from boilercv.models.params import PARAMS
-from boilercv.types import ArrInt
-
-
-def main():
-    destination = PARAMS.paths.filled
-    with process_datasets(destination) as videos_to_process:
-        for name in tqdm(videos_to_process):
-            df = get_contours_df(name)
-            source_ds = get_dataset(name)
-            ds = zeros_like(source_ds, dtype=source_ds[VIDEO].dtype)
-            video = ds[VIDEO]
-            if not df.empty:
-                for frame_num, frame in enumerate(video):
-                    contours: list[ArrInt] = list(  # type: ignore  # pyright 1.1.333
-                        df.loc[frame_num, :]
-                        .groupby("contour")
-                        .apply(lambda grp: grp.values)  # type: ignore  # pyright 1.1.333
-                    )
-                    video[frame_num, :, :] = draw_contours(
-                        scale_bool(frame.values), contours
-                    )
-            ds[VIDEO] = pack(video)
-            ds = ds.drop_vars(ROI)
-            videos_to_process[name] = ds
+from boilercv.types import DF, DS, ArrInt
+
+
+@stage
+def main(workers: int | None = WORKERS, shard_size: int = SHARD_SIZE):
+    destinations = get_unprocessed_destinations(PARAMS.paths.filled, inputs=get_inputs)
+    num_frames = {name: get_num_frames(name) for name in destinations}
+    videos: dict[str, ArrInt] = {}
+    with Writer() as writer:
+        for name, shard, packed in map_shards_in_parallel(
+            fill_shard, num_frames, shard_size, workers
+        ):
+            if shard.start == 0:
+                videos[name] = empty((num_frames[name], *packed.shape[1:]), dtype=uint8)
+            videos[name][shard] = packed
+            if shard.stop == num_frames[name]:
+                writer.submit(write_filled, name, videos.pop(name), destinations[name])
+
+
+def write_filled(name: str, packed: ArrInt, destination: Path):
+    """Write the filled contours of a video, recording them as processed."""
+    save_dataset(get_filled_dataset(name, packed), destination)
+    record_processed(destination)
+
+
+def get_inputs(name: str) -> list[Path]:
+    """Get the files that the filled contours of a video are made from."""
+    source, _ = get_stage(name)
+    contours, _ = get_contours_path(name)
+    return [
+        *get_source_files(main, colors, DEFAULT_CONTOUR_STORE.read),
+        source,
+        contours,
+    ]
+
+
+def fill_shard(name: str, shard: slice) -> ArrInt:
+    """Fill the bubble contours in a shard of frames of a video, bit-packed."""
+    source, _ = get_stage(name)
+    with open_dataset(source) as ds:
+        height, width = ds.sizes[YPX], ds.sizes[XPX]
+    return fill_contours(
+        get_contours_df(name, frames=get_frame_labels(shard)),
+        num_frames=shard.stop - shard.start,
+        height=height,
+        width=width,
+        first_frame=shard.start,
+    )
+
+
+def get_filled_dataset(name: str, packed: ArrInt) -> DS:
+    """Get the dataset of a video with its filled contours in place of its frames."""
+    source, _ = get_stage(name)
+    with open_dataset(source) as source_ds:
+        ds = source_ds.drop_vars(VIDEO).load()
+        ds[VIDEO] = (PACKED_DIMS, packed, source_ds[VIDEO].attrs)
+    return ds
+
+
+def fill_contours(
+    df: DF, num_frames: int, height: int, width: int, first_frame: int = 0
+) -> ArrInt:
+    """Fill contours into a bit-packed video.
+
+    Sorts the contours table once, then finds contour and frame boundaries with
+    `searchsorted`. Each frame's contours are drawn from slices of a single array of
+    vertices into a scratch image, which is packed straight into the output.
+
+    Args:
+        df: Contours with a multi-index of frame and contour number, and columns of
+            "y" and "x" pixel locations of contour vertices.
+        num_frames: Number of frames in the video.
+        height: Height of the video.
+        width: Width of the video.
+        first_frame: Number of the first frame, if the video is a shard of another.
+
+    Returns:
+        Video of filled contours, bit-packed along the last dimension.
+    """
+    packed = zeros((num_frames, height, -(-width // 8)), dtype=uint8)
+    if df.empty:
+        return packed
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    frames = df.index.get_level_values("frame").to_numpy(dtype=int64)
+    contours = df.index.get_level_values("contour").to_numpy(dtype=int64)
+    # OpenCV expects contours as shape (N, 1, 2) with coordinates (x, y)
+    vertices = ascontiguousarray(df[["xpx", "ypx"]].to_numpy(), dtype=int32)
+    vertices = vertices.reshape(-1, 1, 2)
+    # Each contour in the video gets a unique, sorted key
+    keys = frames * (contours.max() + 1) + contours
+    contour_keys = unique(keys)
+    contour_starts = searchsorted(keys, contour_keys)
+    contour_stops = [*contour_starts[1:], len(keys)]
+    all_contours = [
+        vertices[start:stop]
+        for start, stop in zip(contour_starts, contour_stops, strict=True)
+    ]
+    contour_frames = frames[contour_starts]
+    frame_nums = unique(contour_frames)
+    frame_starts = searchsorted(contour_frames, frame_nums, side="left")
+    frame_stops = searchsorted(contour_frames, frame_nums, side="right")
+    image = zeros((height, width), dtype=uint8)
+    for frame_num, start, stop in zip(
+        frame_nums, frame_starts, frame_stops, strict=True
+    ):
+        drawContours(image, all_contours[start:stop], -1, WHITE, FILLED)
+        packed[frame_num - first_frame] = packbits(image, axis=-1)
+        image[:] = 0
+    return packed
 
 
 if __name__ == "__main__":
@@ -1,69 +1,112 @@
 """Get bubble contours."""
 
-from cv2 import CHAIN_APPROX_SIMPLE, bitwise_not
+from collections import defaultdict
+from itertools import chain
+from pathlib import Path
+
+from cv2 import CHAIN_APPROX_SIMPLE
 from loguru import logger
-from numpy import empty, insert, vstack
-from pandas import DataFrame
+from numpy import arange, array, concatenate, cumsum, empty, int32, repeat
+from pandas import DataFrame, concat
 
-from boilercv.data import VIDEO
-from boilercv.data.sets import get_dataset, get_unprocessed_destinations
-from boilercv.images import scale_bool
+from boilercv import SHARD_SIZE, WORKERS
+from boilercv.data.contours import DEFAULT_CONTOUR_STORE
+from boilercv.data.manifest import get_source_files, record_processed
+from boilercv.data.packing import unpack_scaled
+from boilercv.data.pipeline import Writer
+from boilercv.data.sets import (
+    get_frame_labels,
+    get_num_frames,
+    get_scaled_video,
+    get_stage,
+    get_unprocessed_destinations,
+    map_shards_in_parallel,
+)
 from boilercv.images.cv import find_contours
+from boilercv.instrument import stage
 from boilercv.models.params import PARAMS
 from boilercv.types import DF, Vid
 
+METHOD = CHAIN_APPROX_SIMPLE
+"""Contour approximation method."""
+
+
+@stage
+def main(workers: int | None = WORKERS, shard_size: int = SHARD_SIZE):
+    destinations = get_unprocessed_destinations(
+        PARAMS.paths.contours,
+        ext=DEFAULT_CONTOUR_STORE.ext,
+        inputs=get_inputs,
+        params={"method": METHOD},
+    )
+    num_frames = {name: get_num_frames(name) for name in destinations}
+    shards: dict[str, list[DF]] = defaultdict(list)
+    with Writer() as writer:
+        for name, shard, df in map_shards_in_parallel(
+            get_shard_contours, num_frames, shard_size, workers
+        ):
+            shards[name].append(df)
+            if shard.stop == num_frames[name]:
+                writer.submit(
+                    write_contours, name, concat(shards.pop(name)), destinations[name]
+                )
+
+
+def write_contours(name: str, df: DF, destination: Path):
+    """Write the contours of a video, recording them as processed."""
+    if df.empty:
+        logger.warning(f"No contours found in {name}.")
+    DEFAULT_CONTOUR_STORE.write(df, destination)
+    record_processed(destination)
 
-def main():
-    destinations = get_unprocessed_destinations(PARAMS.paths.contours, ext="h5")
-    for source_name, destination in destinations.items():
-        video = bitwise_not(scale_bool(get_dataset(source_name)[VIDEO].values))
-        df = get_all_contours(video, method=CHAIN_APPROX_SIMPLE)
-        df.to_hdf(destination, "contours", complib="zlib", complevel=9)
 
+def get_inputs(name: str) -> list[Path]:
+    """Get the files that the contours of a video are found from."""
+    source, _ = get_stage(name)
+    return [*get_source_files(main, find_contours, unpack_scaled), source]
 
-def get_all_contours(video: Vid, method) -> DF:
+
+def get_shard_contours(name: str, shard: slice) -> DF:
+    """Find all contours in a shard of frames of a video, numbering frames in the video.
+
+    Contours are numbered within each frame, so contours of consecutive shards are
+    merged in frame order by concatenating them.
+    """
+    video = get_scaled_video(name, frame=get_frame_labels(shard), invert=True)
+    return get_all_contours(video, method=METHOD, first_frame=shard.start)
+
+
+def get_all_contours(video: Vid, method, first_frame: int = 0) -> DF:
     """Get all contours in a video.
 
     Produces a dataframe with a multi-index of the video frame and contour number, and
-    two columns indicating the "y" and "x" pixel locations of contour vertices.
+    two columns indicating the "y" and "x" pixel locations of contour vertices. Frames
+    without contours contribute no rows.
 
     Args:
         video: Video to get contours from.
         method: The contour approximation method to use.
+        first_frame: Number of the first frame, if the video is a shard of another.
     """
-    # This nested, pure-numpy approach is a bit hard to follow, but it is much faster
-    # than the more readable approach of building and concatenating dataframes. The
-    # overhead of dataframe creation over ~6000 frames is significant.
-    try:
-        # Vertically stack the contours detected in each frame
-        all_contours = vstack(
-            # For each frame in the video...
-            [
-                # Compose two columns, the frame number and the contours
-                insert(
-                    axis=1,  # Insert column-wise
-                    obj=0,  # Insert at the beginning, e.g. prepend
-                    values=frame_num,
-                    # Vertically stack the pixel locations of each contour
-                    arr=vstack(
-                        # For each contour in the frame...
-                        [
-                            # Prepend the contour number to the contour locations
-                            insert(axis=1, obj=0, values=cont_num, arr=contour)
-                            for cont_num, contour in enumerate(
-                                find_contours(image, method)
-                            )
-                        ]
-                    ),
-                )
-                for frame_num, image in enumerate(video)
-            ]
-        )
-    except ValueError:
-        # Some frames may have no contours. Signal this with an empty array
-        logger.warning("No contours found in this frame.")
-        all_contours = empty((0, 4))
-    # Build the dataframe at the very end to avoid the overhead
+    # Building dataframes, or stacking arrays frame-by-frame, is slow over ~6000 frames.
+    # Instead, gather contours and their lengths, then fill one preallocated array.
+    frame_contours = [find_contours(image, method) for image in video]
+    contours_per_frame = array(
+        [len(contours) for contours in frame_contours], dtype=int
+    )
+    contours = list(chain.from_iterable(frame_contours))
+    points_per_contour = array([len(contour) for contour in contours], dtype=int)
+    # Number each contour within its frame by offsetting from the first in each frame
+    first_contours = cumsum(contours_per_frame) - contours_per_frame
+    contour_nums = arange(len(contours)) - repeat(first_contours, contours_per_frame)
+    contour_frames = repeat(
+        arange(first_frame, first_frame + len(frame_contours)), contours_per_frame
+    )
+    all_contours = empty((points_per_contour.sum(), 4), dtype=int32)
+    all_contours[:, 0] = repeat(contour_frames, points_per_contour)
+    all_contours[:, 1] = repeat(contour_nums, points_per_contour)
+    if contours:
+        all_contours[:, 2:] = concatenate(contours)
     return DataFrame(
         all_contours, columns=["frame", "contour", "ypx", "xpx"]
     ).set_index(["frame", "contour"])
@@ -1,8 +1,10 @@
 """Track bubbles."""
 
+from boilercv.instrument import stage
 from boilercv.models.params import PARAMS
 
 
+@stage
 def main():
     (PARAMS.paths.tracks / "tracks").touch()
 
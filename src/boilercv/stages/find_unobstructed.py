@@ -1,10 +1,171 @@
 """Select the subset of data corresponding to unobstructed bubbles."""
 
+from itertools import count
+from pathlib import Path
+
+from cv2 import DIST_L2, distanceTransform
+from numpy import (
+    arange,
+    argsort,
+    cumsum,
+    flatnonzero,
+    int64,
+    logical_or,
+    maximum,
+    minimum,
+    r_,
+    repeat,
+    uint8,
+    zeros,
+)
+from numpy.typing import NDArray
+from pandas import DataFrame, MultiIndex
+
+from boilercv import WORKERS
+from boilercv.data.contours import DEFAULT_CONTOUR_STORE, INDEX, UNOBSTRUCTED_STORE
+from boilercv.data.manifest import get_source_files
+from boilercv.data.sets import (
+    get_contours_df,
+    get_contours_path,
+    get_roi,
+    get_unprocessed_destinations,
+    process_in_parallel,
+)
+from boilercv.images import scale_bool
+from boilercv.images.cv import get_wall
+from boilercv.instrument import stage
 from boilercv.models.params import PARAMS
+from boilercv.types import DF, ArrBool
+
+BOUNDARY_PX = 1
+"""Contours with a vertex this close to the edge of the ROI touch it."""
+GRID_PX = 32
+"""Size of the cells in the spatial index used to find neighboring bubbles."""
+
+
+@stage
+def main(workers: int | None = WORKERS):
+    destinations = get_unprocessed_destinations(
+        PARAMS.paths.unobstructed,
+        ext=UNOBSTRUCTED_STORE.ext,
+        inputs=get_inputs,
+        params={"boundary_px": BOUNDARY_PX},
+    )
+    process_in_parallel(export_unobstructed, destinations, workers)
+
+
+def get_inputs(name: str) -> list[Path]:
+    """Get the files that the unobstructed bubbles of a video are found from."""
+    contours, _ = get_contours_path(name)
+    return [
+        *get_source_files(main, get_wall, scale_bool, DEFAULT_CONTOUR_STORE.read),
+        contours,
+        PARAMS.paths.rois / f"{name}.nc",
+    ]
+
+
+def export_unobstructed(name: str, destination: Path):
+    """Find unobstructed bubbles in a video and write them to disk."""
+    UNOBSTRUCTED_STORE.write(
+        find_unobstructed(get_contours_df(name), get_roi(name)), destination
+    )
+
+
+def find_unobstructed(contours: DF, roi: ArrBool) -> DF:
+    """Find contours of bubbles not obstructed by the ROI, the wall, or other bubbles.
+
+    Bubbles are obstructed if they touch the edge of the ROI, if they would be clipped
+    by the wall around the ROI, or if their bounding box overlaps that of another bubble
+    in the same frame. Distances to the ROI edge and the wall are looked up in distance
+    transforms computed once per video, and overlapping bubbles are found through a
+    spatial grid index, so all contours are handled at once.
+
+    Args:
+        contours: Contours, as from `get_contours_df`, sorted by frame and contour.
+        roi: Region of interest of the video.
+
+    Returns:
+        Empty table indexed by the frame and contour number of unobstructed bubbles.
+    """
+    frame = contours.index.get_level_values("frame").to_numpy()
+    contour = contours.index.get_level_values("contour").to_numpy()
+    y = contours["ypx"].to_numpy()
+    x = contours["xpx"].to_numpy()
+    if not len(frame):
+        return get_index_df(frame, contour)
+    starts = flatnonzero(
+        r_[True, (frame[1:] != frame[:-1]) | (contour[1:] != contour[:-1])]
+    )
+    y0, y1 = minimum.reduceat(y, starts), maximum.reduceat(y, starts)
+    x0, x1 = minimum.reduceat(x, starts), maximum.reduceat(x, starts)
+    # Distances of pixels inside the ROI to its edge, and to the wall around it
+    roi_distance = distanceTransform(roi.astype(uint8), DIST_L2, 3)
+    wall_distance = distanceTransform(
+        get_wall(scale_bool(roi)).astype(uint8), DIST_L2, 3
+    )
+    touching = minimum.reduceat(roi_distance[y, x], starts) <= BOUNDARY_PX
+    clipped = (
+        wall_distance[(y0 + y1) // 2, (x0 + x1) // 2] <= maximum(y1 - y0, x1 - x0) / 2
+    )
+    overlapping = find_overlapping(frame[starts], y0, y1, x0, x1)
+    unobstructed = ~logical_or.reduce([touching, clipped, overlapping])
+    return get_index_df(frame[starts][unobstructed], contour[starts][unobstructed])
+
+
+def find_overlapping(
+    frame: NDArray[int64],
+    y0: NDArray[int64],
+    y1: NDArray[int64],
+    x0: NDArray[int64],
+    x1: NDArray[int64],
+    grid: int = GRID_PX,
+) -> ArrBool:
+    """Find bounding boxes overlapping another in the same frame.
+
+    Each box is entered into every cell of a grid that it covers, and only boxes sharing
+    a cell in the same frame are compared.
+
+    Args:
+        frame: Frame of each box.
+        y0: Top of each box.
+        y1: Bottom of each box.
+        x0: Left side of each box.
+        x1: Right side of each box.
+        grid: Size of grid cells.
+
+    Returns:
+        Whether each box overlaps another.
+    """
+    cy0, cx0 = y0 // grid, x0 // grid
+    rows, cols = y1 // grid - cy0 + 1, x1 // grid - cx0 + 1
+    cells = rows * cols
+    # Enter each box into each of the cells it covers, keyed by frame and cell
+    box = repeat(arange(len(frame)), cells)
+    cell = arange(cells.sum()) - repeat(cumsum(cells) - cells, cells)
+    cell_y = cy0[box] + cell // cols[box]
+    cell_x = cx0[box] + cell % cols[box]
+    height, width = cell_y.max() + 1, cell_x.max() + 1
+    key = (frame[box].astype(int64) * height + cell_y) * width + cell_x
+    order = argsort(key, kind="stable")
+    key, box = key[order], box[order]
+    # Compare each entry with those following it in the same cell
+    overlapping = zeros(len(frame), dtype=bool)
+    for offset in count(1):
+        shared = key[offset:] == key[:-offset]
+        if not shared.any():
+            break
+        a, b = box[:-offset][shared], box[offset:][shared]
+        overlap = (
+            (y0[a] <= y1[b]) & (y0[b] <= y1[a]) & (x0[a] <= x1[b]) & (x0[b] <= x1[a])
+        )
+        overlapping[a[overlap]] = True
+        overlapping[b[overlap]] = True
+    return overlapping
 
 
-def main():
-    (PARAMS.paths.unobstructed / "unobstructed").touch()
+def get_index_df(frame: NDArray[int64], contour: NDArray[int64]) -> DF:
+    """Get an empty table indexed by frame and contour number."""
+    return DataFrame(index=MultiIndex.from_arrays([frame, contour], names=INDEX))
 
 
 if __name__ == "__main__":
@@ -1,17 +1,27 @@
-"""Update previews for various stages."""
+"""Update previews for various stages.
 
-from collections.abc import Iterator
+Previews of all videos in a stage are stored in one file, each placed in the middle of
+a canvas shared by all previews. Each preview is a chunk of the file, and the offset and
+size of each is recorded alongside it, so adding a preview writes only that preview, and
+reading one preview reads only that preview. The canvas only grows, rewriting all
+previews, when a preview larger than the canvas is added.
+"""
+
+from collections.abc import Iterator, Mapping
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Any
 
-from xarray import combine_by_coords, open_dataset
+from netCDF4 import Dataset as NetCDFFile
+from numpy import stack, zeros
 
-from boilercv.captivate.previews import pad_images
 from boilercv.data import VIDEO, VIDEO_NAME, XPX, YPX, assign_ds
 from boilercv.data.models import Dimension
-from boilercv.data.sets import ALL_STEMS
-from boilercv.types import DS
+from boilercv.data.sets import get_all_stems
+from boilercv.types import DS, Img
+
+PLACEMENT = ["ypx_offset", "xpx_offset", "height", "width"]
+"""Variables locating each preview on the canvas."""
 
 
 @contextmanager
@@ -21,56 +31,126 @@ def new_videos_to_preview(
     """An empty mapping of new videos to preview and write to disk."""
 
     # Yield a mapping of new video names to previews, to be populated by the user
-    if reprocess:
-        # Reprocess all names
-        new_video_names = ALL_STEMS
-    else:
-        # Get the names missing from the destination
-        existing_names: list[str] = []
-        if destination.exists():
-            with open_dataset(destination) as existing_ds:
-                existing_names.extend(list(existing_ds[VIDEO_NAME].values))
-        new_video_names = [name for name in ALL_STEMS if name not in existing_names]
+    existing_names = [] if reprocess else get_preview_names(destination)
+    new_video_names = [name for name in get_all_stems() if name not in existing_names]
     videos_to_preview = dict.fromkeys(new_video_names)
 
     yield videos_to_preview
 
-    # Keep only valid received previews and build a dataset of new previews
+    # Keep only valid received previews and write them
     if received_previews := {
         video_name: preview
         for video_name, preview in videos_to_preview.items()
         if preview is not None and video_name in new_video_names
     }:
-        received_video_names = list(received_previews.keys())
-        received_previews = list(received_previews.values())
-        new_ds = get_preview_ds(received_video_names, received_previews)
-
-        if not reprocess and destination.exists():
-            with open_dataset(destination) as existing_ds:
-                if new_ds[VIDEO].shape == existing_ds[VIDEO].shape:
-                    # Combine datasets if they're the same shape
-                    new_ds = combine_by_coords([existing_ds, new_ds])
-                else:
-                    # Otherwise: destructure, pad, and rebuild them together
-                    existing_names = list(existing_ds[VIDEO_NAME].values)
-                    new_ds = get_preview_ds(
-                        existing_names + received_video_names,
-                        received_previews + list(existing_ds.video.values),
-                    )
-
-        new_ds.to_netcdf(path=destination, encoding={VIDEO: {"zlib": True}})
+        if reprocess or not destination.exists():
+            write_previews(destination, received_previews)
+        else:
+            append_previews(destination, received_previews)
+
+
+def get_preview_names(path: Path) -> list[str]:
+    """Get the names of videos previewed in a file, without reading their previews."""
+    if not path.exists():
+        return []
+    with NetCDFFile(path) as file:
+        return list(file[VIDEO_NAME][:])
+
+
+def read_preview(path: Path, name: str) -> Img:
+    """Read the preview of one video, without reading the others."""
+    with NetCDFFile(path) as file:
+        return _read_preview(file, list(file[VIDEO_NAME][:]).index(name))
+
+
+def read_previews(path: Path) -> dict[str, Img]:
+    """Read the previews of all videos, keyed by video name."""
+    with NetCDFFile(path) as file:
+        return {
+            name: _read_preview(file, i) for i, name in enumerate(file[VIDEO_NAME][:])
+        }
+
+
+def write_previews(destination: Path, previews: Mapping[str, Img]):
+    """Write previews to a new file, on a canvas fitting the largest of them."""
+    ds = get_preview_ds(list(previews), list(previews.values()))
+    ds.to_netcdf(
+        path=destination,
+        encoding={VIDEO: {"zlib": True, "chunksizes": (1, *ds[VIDEO].shape[1:])}},
+        unlimited_dims=[VIDEO_NAME],
+    )
+
+
+def append_previews(destination: Path, previews: Mapping[str, Img]):
+    """Append previews to a file, writing only the new previews if they fit."""
+    with NetCDFFile(destination, "a") as file:
+        video = file[VIDEO]
+        canvas = video.shape[1:]
+        if (
+            file.dimensions[VIDEO_NAME].isunlimited()
+            and all(name in file.variables for name in PLACEMENT)
+            and all(
+                preview.shape[0] <= canvas[0] and preview.shape[1] <= canvas[1]
+                for preview in previews.values()
+            )
+        ):
+            for name, preview in previews.items():
+                i = file.dimensions[VIDEO_NAME].size
+                placed, placement = place(preview, canvas)
+                file[VIDEO_NAME][i] = name
+                video[i] = placed
+                for var, value in zip(PLACEMENT, placement, strict=True):
+                    file[var][i] = value
+            return
+    write_previews(destination, {**read_previews(destination), **previews})
 
 
 def get_preview_ds(preview_names: list[str], previews: list[Any]) -> DS:
-    """Get a dataset of preview images, padding sizes as necessary."""
-    return assign_ds(
+    """Get a dataset of preview images, placed on a canvas fitting all of them."""
+    canvas = tuple(
+        max(preview.shape[dim] for preview in previews) for dim in range(2)
+    ) + tuple(previews[0].shape[2:])
+    placed_previews, placements = zip(
+        *(place(preview, canvas) for preview in previews), strict=True
+    )
+    ds = assign_ds(
         name=VIDEO,
         long_name="Video preview",
         units="Pixel state",
-        data=pad_images(previews),
+        data=stack(placed_previews),
         dims=(
             Dimension(dim=VIDEO_NAME, long_name="Video name", coords=preview_names),
             Dimension(dim=YPX, long_name="Height", units="px"),
             Dimension(dim=XPX, long_name="Width", units="px"),
         ),
     )
+    for var, values in zip(PLACEMENT, zip(*placements, strict=True), strict=True):
+        ds[var] = (VIDEO_NAME, list(values), {"units": "px"})
+    return ds
+
+
+def place(preview: Img, canvas: tuple[int, ...]) -> tuple[Img, tuple[int, ...]]:
+    """Place a preview in the middle of a blank canvas.
+
+    Returns:
+        The placed preview, and its vertical and horizontal offsets, height and width.
+    """
+    height, width = preview.shape[:2]
+    y, x = (canvas[0] - height) // 2, (canvas[1] - width) // 2
+    placed = zeros(canvas, dtype=preview.dtype)
+    placed[y : y + height, x : x + width] = preview
+    return placed, (y, x, height, width)
+
+
+def _read_preview(file: NetCDFFile, i: int) -> Img:
+    """Read a preview from an open file, cropping it from the canvas if possible."""
+    video = file[VIDEO]
+    video.set_auto_mask(False)
+    preview = video[i]
+    # Booleans are stored as bytes, marked by an attribute as in `xarray`
+    if "dtype" in video.ncattrs() and video.getncattr("dtype") == "bool":
+        preview = preview.astype(bool)
+    if all(name in file.variables for name in PLACEMENT):
+        y, x, height, width = (int(file[name][i]) for name in PLACEMENT)
+        preview = preview[y : y + height, x : x + width]
+    return preview
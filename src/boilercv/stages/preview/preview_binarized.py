@@ -1,22 +1,30 @@
 """Update previews for the binarization stage."""
 
 from loguru import logger
-from tqdm import tqdm
 
-from boilercv.data import FRAME, ROI, VIDEO
-from boilercv.data.sets import get_dataset
+from boilercv import WORKERS
+from boilercv.data.packing import pack_img, packed_and, unpack_img
+from boilercv.data.sets import LazyVideo, get_roi, map_in_parallel
+from boilercv.instrument import stage
 from boilercv.models.params import PARAMS
 from boilercv.stages.preview import new_videos_to_preview
+from boilercv.types import Img
 
 
-def main():
-    stage = "sources"
+@stage
+def main(workers: int | None = WORKERS):
     destination = PARAMS.paths.binarized_preview
     with new_videos_to_preview(destination) as videos_to_preview:
-        for video_name in tqdm(videos_to_preview):
-            ds = get_dataset(video_name, stage=stage, num_frames=1)
-            first_frame = ds[VIDEO].isel({FRAME: 0}).values
-            videos_to_preview[video_name] = first_frame & ds[ROI].values
+        for video_name, preview in map_in_parallel(
+            get_binarized_preview, videos_to_preview, workers
+        ):
+            videos_to_preview[video_name] = preview
+
+
+def get_binarized_preview(video_name: str) -> Img:
+    """Get the first binarized frame of a video, masked by its ROI."""
+    with LazyVideo(video_name, stage="sources") as video:
+        return unpack_img(packed_and(video.packed[0], pack_img(get_roi(video_name))))
 
 
 if __name__ == "__main__":
@@ -1,21 +1,29 @@
 """Update previews for the filled contours stage."""
 
 from loguru import logger
-from tqdm import tqdm
 
-from boilercv.data import FRAME, VIDEO
-from boilercv.data.sets import get_dataset
+from boilercv import WORKERS
+from boilercv.data.sets import LazyVideo, map_in_parallel
+from boilercv.instrument import stage
 from boilercv.models.params import PARAMS
 from boilercv.stages.preview import new_videos_to_preview
+from boilercv.types import Img
 
 
-def main():
-    stage = "filled"
+@stage
+def main(workers: int | None = WORKERS):
     destination = PARAMS.paths.filled_preview
     with new_videos_to_preview(destination) as videos_to_preview:
-        for video_name in tqdm(videos_to_preview):
-            ds = get_dataset(video_name, stage=stage, num_frames=1)
-            videos_to_preview[video_name] = ds[VIDEO].isel({FRAME: 0}).values
+        for video_name, preview in map_in_parallel(
+            get_filled_preview, videos_to_preview, workers
+        ):
+            videos_to_preview[video_name] = preview
+
+
+def get_filled_preview(video_name: str) -> Img:
+    """Get the first filled frame of a video."""
+    with LazyVideo(video_name, stage="filled") as video:
+        return video[0]
 
 
 if __name__ == "__main__":
@@ -1,21 +1,31 @@
 """Update previews for grayscale videos."""
 
 from loguru import logger
-from tqdm import tqdm
 
+from boilercv import WORKERS
 from boilercv.data import FRAME, VIDEO
-from boilercv.data.sets import get_dataset
+from boilercv.data.sets import get_dataset, map_in_parallel
+from boilercv.instrument import stage
 from boilercv.models.params import PARAMS
 from boilercv.stages.preview import new_videos_to_preview
+from boilercv.types import Img
 
 
-def main():
-    stage = "large_sources"
+@stage
+def main(workers: int | None = WORKERS):
     destination = PARAMS.paths.gray_preview
     with new_videos_to_preview(destination) as videos_to_preview:
-        for video_name in tqdm(videos_to_preview):
-            if ds := get_dataset(video_name, stage=stage, num_frames=1):
-                videos_to_preview[video_name] = ds[VIDEO].isel({FRAME: 0}).values
+        for video_name, preview in map_in_parallel(
+            get_gray_preview, videos_to_preview, workers
+        ):
+            videos_to_preview[video_name] = preview
+
+
+def get_gray_preview(video_name: str) -> Img | None:
+    """Get the first grayscale frame of a video, if it is available."""
+    if ds := get_dataset(video_name, stage="large_sources", num_frames=1):
+        return ds[VIDEO].isel({FRAME: 0}).values
+    return None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,258 @@
+"""Link objects across frames into tracks."""
+
+from collections.abc import Iterator
+
+from numpy import (
+    arange,
+    argsort,
+    bincount,
+    bool_,
+    column_stack,
+    concatenate,
+    diag_indices,
+    diff,
+    empty,
+    flatnonzero,
+    float64,
+    full,
+    inf,
+    int64,
+    isfinite,
+    lexsort,
+    ones,
+    r_,
+    repeat,
+    unique,
+    zeros,
+)
+from numpy.typing import NDArray
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import KDTree
+
+from boilercv.types import DF
+
+TRACK = "particle"
+"""Column of track numbers, named as in Trackpy."""
+MAX_JOINT_LINKS = 64
+"""Maximum number of ambiguous candidate links to solve without splitting subnetworks."""
+
+
+def link(objects: DF, search_range: float, memory: int = 0) -> DF:
+    """Link objects across frames into tracks, as in `trackpy.link`.
+
+    Args:
+        objects: Objects with "frame", "y", and "x" columns.
+        search_range: Maximum distance an object can move between frames.
+        memory: Number of frames a track may go undetected and still be continued.
+
+    Returns:
+        Objects with a column of track numbers.
+    """
+    return objects.assign(**{
+        TRACK: link_arrays(
+            objects["frame"].to_numpy(),
+            objects["y"].to_numpy(),
+            objects["x"].to_numpy(),
+            search_range,
+            memory,
+        )
+    })
+
+
+def link_arrays(
+    frame: NDArray[int64],
+    y: NDArray[float64],
+    x: NDArray[float64],
+    search_range: float,
+    memory: int = 0,
+) -> NDArray[int64]:
+    """Link objects across frames into tracks.
+
+    In each frame, candidate links within the search range of the last position of each
+    active track are found with a KD-tree. Tracks and objects connected by candidate
+    links form subnetworks, and the links in each subnetwork are chosen to minimize the
+    total squared displacement, where leaving a track or an object unlinked costs the
+    squared search range. Tracks that go undetected for up to `memory` frames stay
+    active, closing gaps where detection briefly fails.
+
+    Args:
+        frame: Frame of each object.
+        y: Vertical position of each object.
+        x: Horizontal position of each object.
+        search_range: Maximum distance an object can move between frames.
+        memory: Number of frames a track may go undetected and still be continued.
+
+    Returns:
+        Track number of each object, numbered in order of appearance.
+    """
+    num_objects = len(frame)
+    if not num_objects:
+        return empty(0, dtype=int64)
+    order = lexsort((x, y, frame))
+    frame = frame[order]
+    positions = column_stack((y[order], x[order]))
+    tracks = empty(num_objects, dtype=int64)
+    # Last position and frame of each track, indexed by track number
+    last_positions = empty((num_objects, 2))
+    last_frames = empty(num_objects, dtype=int64)
+    active = empty(0, dtype=int64)
+    num_tracks = 0
+    starts = flatnonzero(r_[True, diff(frame) != 0])
+    for start, stop in zip(starts, r_[starts[1:], num_objects], strict=True):
+        current = frame[start]
+        active = active[current - last_frames[active] <= memory + 1]
+        links = assign(last_positions[active], positions[start:stop], search_range)
+        new = links < 0
+        frame_tracks = empty(stop - start, dtype=int64)
+        frame_tracks[~new] = active[links[~new]]
+        frame_tracks[new] = arange(num_tracks, num_tracks + new.sum())
+        num_tracks += new.sum()
+        active = r_[active, frame_tracks[new]]
+        tracks[start:stop] = frame_tracks
+        last_positions[frame_tracks] = positions[start:stop]
+        last_frames[frame_tracks] = current
+    result = empty(num_objects, dtype=int64)
+    result[order] = tracks
+    return result
+
+
+def assign(
+    tracks: NDArray[float64], points: NDArray[float64], search_range: float
+) -> NDArray[int64]:
+    """Assign points to tracks, minimizing total squared displacement in subnetworks.
+
+    Args:
+        tracks: Last positions of tracks.
+        points: Positions of points to assign.
+        search_range: Maximum distance between a track and its assigned point.
+
+    Returns:
+        Index of the track assigned to each point, or -1 for points starting new tracks.
+    """
+    links = full(len(points), -1, dtype=int64)
+    if not len(tracks) or not len(points):
+        return links
+    neighbors = KDTree(points).query_ball_point(tracks, search_range)
+    rows = repeat(arange(len(tracks)), [len(n) for n in neighbors])
+    if not len(rows):
+        return links
+    cols = concatenate(neighbors).astype(int64)
+    costs = ((tracks[rows] - points[cols]) ** 2).sum(axis=1)
+    # Links between a track and a point with no other candidates are unambiguous
+    num_tracks = len(tracks)
+    unambiguous = (bincount(rows, minlength=num_tracks)[rows] == 1) & (
+        bincount(cols, minlength=len(points))[cols] == 1
+    )
+    links[cols[unambiguous]] = rows[unambiguous]
+    if unambiguous.all():
+        return links
+    rows, cols, costs = rows[~unambiguous], cols[~unambiguous], costs[~unambiguous]
+    for in_subnet in get_subnets(rows, cols, num_tracks, len(points)):
+        sub_tracks, sub_points = unique(rows[in_subnet]), unique(cols[in_subnet])
+        cost = full((len(sub_tracks), len(sub_points)), inf)
+        cost[
+            sub_tracks.searchsorted(rows[in_subnet]),
+            sub_points.searchsorted(cols[in_subnet]),
+        ] = costs[in_subnet]
+        for t, p in solve(cost, search_range**2):
+            links[sub_points[p]] = sub_tracks[t]
+    return links
+
+
+def get_subnets(
+    rows: NDArray[int64], cols: NDArray[int64], num_tracks: int, num_points: int
+) -> Iterator[NDArray[bool_]]:
+    """Get candidate links in each subnetwork of tracks and points.
+
+    Solving subnetworks together gives the same links as solving them separately, so
+    they are only split up if there are enough candidates to make that worthwhile.
+
+    Args:
+        rows: Track of each candidate link.
+        cols: Point of each candidate link.
+        num_tracks: Number of tracks.
+        num_points: Number of points.
+
+    Yields:
+        Mask of the candidate links in each subnetwork.
+    """
+    if len(rows) <= MAX_JOINT_LINKS:
+        yield ones(len(rows), dtype=bool)
+        return
+    # Tracks and points are nodes, and candidate links are edges
+    size = num_tracks + num_points
+    graph = coo_matrix((ones(len(rows)), (rows, cols + num_tracks)), shape=(size, size))
+    _, labels = connected_components(graph, directed=False)
+    link_labels = labels[rows]
+    for label in unique(link_labels):
+        yield link_labels == label
+
+
+def solve(cost: NDArray[float64], unlinked: float) -> list[tuple[int, int]]:
+    """Choose links minimizing total cost, where leaving any unlinked has a cost.
+
+    Args:
+        cost: Cost of linking each track to each point. Infinite if not a candidate.
+        unlinked: Cost of leaving a track or point unlinked.
+
+    Returns:
+        Indices of linked tracks and points.
+    """
+    num_tracks, num_points = cost.shape
+    if num_tracks == num_points == 1:
+        return [(0, 0)]
+    # Pad with a dummy point for each track and a dummy track for each point
+    size = num_tracks + num_points
+    augmented = full((size, size), inf)
+    augmented[:num_tracks, :num_points] = cost
+    augmented[:num_tracks, num_points:][diag_indices(num_tracks)] = unlinked
+    augmented[num_tracks:, :num_points][diag_indices(num_points)] = unlinked
+    augmented[num_tracks:, num_points:] = 0
+    # The solver requires finite costs, so forbid links with a prohibitive cost
+    augmented[~isfinite(augmented)] = 2 * unlinked * size + 1
+    rows, cols = linear_sum_assignment(augmented)
+    return [
+        (t, p)
+        for t, p in zip(rows, cols, strict=True)
+        if t < num_tracks and p < num_points and isfinite(cost[t, p])
+    ]
+
+
+def get_motion(tracks: DF, track: str = TRACK) -> DF:
+    """Get lifetime, displacement, and velocity of objects along their tracks.
+
+    Computed for all tracks at once by sorting objects by track and frame, then taking
+    differences within each track.
+
+    Args:
+        tracks: Objects with "frame", "y", and "x" columns, and a column of tracks.
+        track: Column of tracks.
+
+    Returns:
+        Objects with the number of frames in their track, "frame_lifetime", and their
+        displacement since the previous frame of their track in pixels, "dy_px" and
+        "dx_px", and velocity in pixels per frame, "vy_px" and "vx_px". Displacement
+        and velocity are zero for the first object in each track.
+    """
+    frame = tracks["frame"].to_numpy()
+    y = tracks["y"].to_numpy(dtype=float)
+    x = tracks["x"].to_numpy(dtype=float)
+    ids = tracks[track].to_numpy()
+    order = lexsort((frame, ids))
+    ids, frame, y, x = ids[order], frame[order], y[order], x[order]
+    first = r_[True, ids[1:] != ids[:-1]] if len(ids) else zeros(0, dtype=bool)
+    starts = flatnonzero(first)
+    counts = r_[starts[1:], len(ids)] - starts
+    dy, dx, dframe = (r_[0, diff(values)] for values in (y, x, frame))
+    dy[first], dx[first], dframe[first] = 0, 0, 1
+    motion = {
+        "frame_lifetime": repeat(counts, counts),
+        "dy_px": dy,
+        "dx_px": dx,
+        "vy_px": dy / dframe,
+        "vx_px": dx / dframe,
+    }
+    unsort = argsort(order)
+    return tracks.assign(**{col: values[unsort] for col, values in motion.items()})
@@ -7,6 +7,11 @@ from numpy.typing import ArrayLike, NBitBase, NDArray
 from pandas import DataFrame, Series
 from xarray import DataArray, Dataset
 
+from boilercv import set_pandas_options
+
+# Modules using `pandas` get their types here, so this sets its options before use
+set_pandas_options()
+
 DF: TypeAlias = DataFrame
 DA: TypeAlias = DataArray
 DS: TypeAlias = Dataset
@@ -0,0 +1,221 @@
+"""Benchmarks of pipeline stages on synthetic bubble videos.
+
+Each stage from sources to tracks is timed on the output of the stage before it, and
+its throughput in frames per second and peak resident memory are recorded alongside
+its timings. The cold start of each stage, importing it in a fresh process, is timed
+as well. Benchmarks run once as plain tests unless enabled. Enable them without
+`pytest-xdist`, and save results to `.benchmarks` to compare them across commits:
+
+    pytest tests/boilercv_tests/test_benchmarks.py -n 0 --benchmark-enable \
+        --benchmark-autosave --benchmark-compare
+
+Set the size of synthetic videos with the `BOILERCV_BENCHMARK_FRAMES`, `_HEIGHT`,
+`_WIDTH`, and `_BUBBLES` environment variables.
+"""
+
+from collections.abc import Callable
+from os import environ
+from subprocess import run as run_process
+from sys import executable
+from threading import Event, Thread
+from typing import Any
+
+import pytest
+from cv2 import CHAIN_APPROX_SIMPLE, LINE_AA, circle
+from numpy import empty, linspace, packbits, pi, sin, uint8
+from numpy.random import default_rng
+from psutil import Process
+
+from boilercv_tests import PIPELINE_STAGES
+
+NUM_FRAMES = int(environ.get("BOILERCV_BENCHMARK_FRAMES", 100))
+"""Number of frames in synthetic videos."""
+HEIGHT = int(environ.get("BOILERCV_BENCHMARK_HEIGHT", 256))
+"""Height of synthetic videos."""
+WIDTH = int(environ.get("BOILERCV_BENCHMARK_WIDTH", 320))
+"""Width of synthetic videos."""
+NUM_BUBBLES = int(environ.get("BOILERCV_BENCHMARK_BUBBLES", 20))
+"""Number of bubbles in synthetic videos."""
+SEARCH_RANGE = 10
+"""Search range for linking bubbles in synthetic videos, larger than their rise."""
+RSS_INTERVAL = 0.001
+"""Interval between samples of resident memory, in seconds."""
+
+
+def get_synthetic_video(
+    num_frames: int = NUM_FRAMES,
+    height: int = HEIGHT,
+    width: int = WIDTH,
+    num_bubbles: int = NUM_BUBBLES,
+    seed: int = 0,
+):
+    """Get a video of bubbles rising, swaying, and shrinking over a graded background.
+
+    Bubbles are dark rings around bright centers, as in backlit videos, and wrap around
+    to the bottom when they rise past the top of the frame.
+    """
+    rng = default_rng(seed)
+    video = empty((num_frames, height, width), dtype=uint8)
+    background = linspace(150, 200, height, dtype=uint8)[:, None]
+    y = rng.uniform(0, height, num_bubbles)
+    x = rng.uniform(0, width, num_bubbles)
+    radius = rng.uniform(6, 20, num_bubbles)
+    rise = rng.uniform(1, 4, num_bubbles)
+    phase = rng.uniform(0, 2 * pi, num_bubbles)
+    for frame, image in enumerate(video):
+        image[:] = background
+        shrinkage = 1 - 0.5 * frame / num_frames
+        for yb, xb, rb, vb, pb in zip(y, x, radius, rise, phase, strict=True):
+            center = (
+                round(xb + 5 * sin(pb + frame / 10)) % width,
+                round(yb - vb * frame) % height,
+            )
+            r = max(round(rb * shrinkage), 3)
+            circle(image, center, r, 60, thickness=3, lineType=LINE_AA)
+            circle(image, center, max(r - 3, 1), 230, thickness=-1, lineType=LINE_AA)
+    return video
+
+
+def get_peak_rss(func: Callable[..., Any], *args: Any) -> float:
+    """Get peak resident memory of this process in MB while calling a function.
+
+    Memory is sampled in a thread, since the high-water mark of the process can't be
+    reset between benchmarks.
+    """
+    process = Process()
+    peak = process.memory_info().rss
+    done = Event()
+
+    def sample():
+        nonlocal peak
+        while not done.wait(RSS_INTERVAL):
+            peak = max(peak, process.memory_info().rss)
+
+    thread = Thread(target=sample)
+    thread.start()
+    try:
+        func(*args)
+    finally:
+        done.set()
+        thread.join()
+    return max(peak, process.memory_info().rss) / 2**20
+
+
+def run(benchmark, num_frames: int, func: Callable[..., Any], *args: Any) -> Any:
+    """Benchmark a stage, recording its throughput and peak memory."""
+    result = benchmark(func, *args)
+    if not benchmark.disabled:
+        benchmark.extra_info["frames_per_s"] = num_frames / benchmark.stats.stats.median
+        benchmark.extra_info["peak_rss_mb"] = get_peak_rss(func, *args)
+    return result
+
+
+@pytest.fixture(scope="module")
+def video():
+    """Synthetic bubble video."""
+    return get_synthetic_video()
+
+
+@pytest.fixture(scope="module")
+def binarized(video):
+    """Binarized synthetic video."""
+    from boilercv.images.cv import binarize_video  # noqa: PLC0415
+
+    return binarize_video(video)
+
+
+@pytest.fixture(scope="module")
+def packed(binarized):
+    """Bit-packed binarized video."""
+    return packbits(binarized, axis=-1)
+
+
+@pytest.fixture(scope="module")
+def scaled(packed):
+    """Binarized video, scaled and inverted for finding contours."""
+    from boilercv.data.packing import unpack_scaled  # noqa: PLC0415
+
+    return unpack_scaled(packed, invert=True)
+
+
+@pytest.fixture(scope="module")
+def contours(scaled):
+    """Contours in the synthetic video."""
+    from boilercv.stages.find_contours import get_all_contours  # noqa: PLC0415
+
+    return get_all_contours(scaled, CHAIN_APPROX_SIMPLE)
+
+
+@pytest.fixture(scope="module")
+def objects(contours):
+    """Objects in the synthetic video."""
+    from boilercv.data.objects import get_objects  # noqa: PLC0415
+
+    return get_objects(contours)
+
+
+def test_binarize(benchmark, video):
+    from boilercv.images.cv import binarize_video  # noqa: PLC0415
+
+    result = run(benchmark, len(video), binarize_video, video)
+    assert not result.all()
+
+
+def test_binarize_packed(benchmark, video):
+    from boilercv.images.cv import binarize_video  # noqa: PLC0415
+
+    run(benchmark, len(video), lambda: binarize_video(video, packed=True))
+
+
+def test_pack(benchmark, binarized):
+    run(benchmark, len(binarized), lambda: packbits(binarized, axis=-1))
+
+
+def test_unpack(benchmark, packed):
+    from boilercv.data.packing import unpack_scaled  # noqa: PLC0415
+
+    run(benchmark, len(packed), lambda: unpack_scaled(packed, invert=True))
+
+
+def test_get_all_contours(benchmark, scaled):
+    from boilercv.stages.find_contours import get_all_contours  # noqa: PLC0415
+
+    result = run(benchmark, len(scaled), get_all_contours, scaled, CHAIN_APPROX_SIMPLE)
+    assert not result.empty
+
+
+def test_fill_contours(benchmark, contours):
+    from boilercv.stages.fill import fill_contours  # noqa: PLC0415
+
+    result = run(
+        benchmark,
+        NUM_FRAMES,
+        lambda: fill_contours(contours, NUM_FRAMES, HEIGHT, WIDTH),
+    )
+    assert result.any()
+
+
+def test_get_objects(benchmark, contours):
+    from boilercv.data.objects import get_objects  # noqa: PLC0415
+
+    result = run(benchmark, NUM_FRAMES, get_objects, contours)
+    assert not result.empty
+
+
+def test_link(benchmark, objects):
+    from boilercv.tracking import TRACK, link  # noqa: PLC0415
+
+    result = run(benchmark, NUM_FRAMES, link, objects, SEARCH_RANGE)
+    assert result[TRACK].nunique() < len(result)
+
+
+@pytest.mark.parametrize("module", PIPELINE_STAGES)
+def test_import(benchmark, module):
+    import boilercv  # noqa: PLC0415
+
+    benchmark.pedantic(
+        run_process,
+        ([executable, "-c", f"import {module}"],),
+        {"check": True, "cwd": boilercv.PROJECT_PATH},
+        rounds=3,
+    )
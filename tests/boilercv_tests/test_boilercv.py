@@ -3,9 +3,11 @@
 from importlib import import_module
 
 import pytest
-from numpy import allclose, array, linspace
+from cv2 import CHAIN_APPROX_SIMPLE
+from numpy import allclose, arange, array, linspace, uint8, zeros, zeros_like
+from xarray import open_dataset
 
-from boilercv_tests import STAGES
+from boilercv_tests import PIPELINE_STAGES, STAGES
 
 
 def test_correlations():
@@ -53,3 +55,1024 @@ def test_correlations():
 def test_stages(stage: str):
     """Test that stages can run."""
     import_module(stage).main()
+
+
+def test_binarize_chunked(tmp_path):
+    """Test that chunked binarization matches binarizing the whole video at once."""
+
+    from boilercv.data import FRAME, ROI, VIDEO, apply_to_img_da  # noqa: PLC0415
+    from boilercv.data.packing import pack  # noqa: PLC0415
+    from boilercv.data.sets import get_dataset  # noqa: PLC0415
+    from boilercv.images import scale_bool  # noqa: PLC0415
+    from boilercv.images.cv import apply_mask, binarize  # noqa: PLC0415
+    from boilercv.manual.binarize import binarize_chunked  # noqa: PLC0415
+
+    name = "2022-01-06T15-20-34"
+    ds = get_dataset(name).drop_vars(ROI)
+    ds[VIDEO] = scale_bool(ds[VIDEO]).where(ds[VIDEO], 100).astype("uint8")
+    destination = tmp_path / "binarized.nc"
+    roi_destination = tmp_path / "roi.nc"
+    binarize_chunked(ds.copy(), destination, roi_destination, chunk_size=7)
+    with open_dataset(destination) as result, open_dataset(roi_destination) as roi:
+        masked = apply_to_img_da(
+            apply_mask, ds[VIDEO], scale_bool(roi[ROI]), vectorize=True
+        )
+        expected = pack(apply_to_img_da(binarize, masked, vectorize=True))
+        assert result[VIDEO].sizes[FRAME] == ds[VIDEO].sizes[FRAME]
+        assert (result[VIDEO].values == expected.values).all()
+
+
+def test_binarize_sharded(tmp_path):
+    """Test that binarizing shards in workers matches binarizing in chunks."""
+
+    from boilercv.data import ROI, VIDEO  # noqa: PLC0415
+    from boilercv.data.sets import get_dataset  # noqa: PLC0415
+    from boilercv.images import scale_bool  # noqa: PLC0415
+    from boilercv.manual.binarize import (  # noqa: PLC0415
+        binarize_chunked,
+        binarize_sharded,
+    )
+
+    ds = get_dataset("2022-01-06T15-20-34").drop_vars(ROI)
+    ds[VIDEO] = scale_bool(ds[VIDEO]).where(ds[VIDEO], 100).astype("uint8")
+    source = tmp_path / "source.nc"
+    ds.to_netcdf(source)
+    binarize_chunked(ds.copy(), tmp_path / "chunked.nc", tmp_path / "chunked_roi.nc")
+    binarize_sharded(
+        source,
+        tmp_path / "sharded.nc",
+        tmp_path / "sharded_roi.nc",
+        chunk_size=7,
+        shard_size=30,
+        workers=2,
+    )
+    for name, var in [("", VIDEO), ("_roi", ROI)]:
+        with (
+            open_dataset(tmp_path / f"chunked{name}.nc") as expected,
+            open_dataset(tmp_path / f"sharded{name}.nc") as result,
+        ):
+            assert (result[var].values == expected[var].values).all()
+
+
+def test_binarize_video():
+    """Test that binarizing a video in threads matches binarizing each frame."""
+
+    from numpy import stack  # noqa: PLC0415
+    from numpy.random import default_rng  # noqa: PLC0415
+
+    from boilercv.images.cv import apply_mask, binarize, binarize_video  # noqa: PLC0415
+
+    rng = default_rng(0)
+    video = rng.integers(0, 255, (5, 30, 21), dtype=uint8)
+    mask = rng.choice(array([0, 255], dtype=uint8), (30, 21))
+    result = binarize_video(video, block_size=6)
+    assert result.dtype == bool
+    assert (result == stack([binarize(img, block_size=6) for img in video])).all()
+    assert (
+        binarize_video(video, mask)
+        == stack([binarize(apply_mask(img, mask)) for img in video])
+    ).all()
+
+
+def test_get_scaled_video():
+    """Test that videos unpacked straight to scaled images match scaling them."""
+
+    from cv2 import bitwise_not  # noqa: PLC0415
+
+    from boilercv.data import VIDEO  # noqa: PLC0415
+    from boilercv.data.sets import get_dataset, get_scaled_video  # noqa: PLC0415
+    from boilercv.images import scale_bool  # noqa: PLC0415
+
+    name = "2022-01-06T15-20-34"
+    expected = scale_bool(get_dataset(name, frame=slice(2, 9))[VIDEO].values)
+    assert (get_scaled_video(name, frame=slice(2, 9)) == expected).all()
+    out = zeros_like(expected)
+    get_scaled_video(name, frame=slice(2, 9), invert=True, out=out)
+    assert (out == bitwise_not(expected)).all()
+
+
+def test_packed_operations():
+    """Test that operations on packed videos match those on unpacked videos."""
+
+    from numpy import packbits, unpackbits  # noqa: PLC0415
+    from numpy.random import default_rng  # noqa: PLC0415
+
+    from boilercv.data.packing import (  # noqa: PLC0415
+        all_frames,
+        any_frames,
+        count_pixels,
+        pack_img,
+        packed_and,
+        packed_not,
+        packed_or,
+        unpack_img,
+    )
+
+    rng = default_rng(0)
+    video = rng.random((4, 6, 21)) > 0.5
+    roi = rng.random((6, 21)) > 0.5
+    packed = packbits(video, axis=-1)
+    assert (
+        unpack_img(packed_and(packed, pack_img(roi)))[..., :21] == video & roi
+    ).all()
+    assert (unpack_img(packed_or(packed, pack_img(roi)))[..., :21] == video | roi).all()
+    inverted = packed_not(packed, width=21)
+    assert (unpack_img(inverted)[..., :21] == ~video).all()
+    assert not unpackbits(inverted, axis=-1)[..., 21:].any()
+    assert (unpack_img(any_frames(packed))[:, :21] == video.any(axis=0)).all()
+    assert (unpack_img(all_frames(packed))[:, :21] == video.all(axis=0)).all()
+    assert (count_pixels(packed) == video.sum(axis=(1, 2))).all()
+
+
+def test_lazy_video_reductions():
+    """Test that reductions over lazy videos match reductions of loaded videos."""
+
+    from boilercv.data import VIDEO  # noqa: PLC0415
+    from boilercv.data.sets import LazyVideo, get_dataset  # noqa: PLC0415
+
+    name = "2022-01-06T15-20-34"
+    expected = get_dataset(name)[VIDEO].values
+    with LazyVideo(name) as video:
+        assert (video.get_composite(batch_size=30) == expected.max(axis=0)).all()
+        for frame in (slice(5, 90, 7), slice(None, None, -3)):
+            assert (
+                video.get_composite(frame, batch_size=4) == expected[frame].max(axis=0)
+            ).all()
+        assert (video.count_pixels(batch_size=30) == expected.sum(axis=(1, 2))).all()
+
+
+def test_plot_composite():
+    """Test that composites of packed videos match composites of unpacked videos."""
+
+    from matplotlib.pyplot import close, subplots  # noqa: PLC0415
+
+    from boilercv.data import VIDEO  # noqa: PLC0415
+    from boilercv.data.sets import get_dataset  # noqa: PLC0415
+    from boilercv.experiments.e230920_subcool import (  # noqa: PLC0415
+        plot_composite,
+        plot_composite_da,
+    )
+    from boilercv.images import scale_bool  # noqa: PLC0415
+
+    name = "2022-01-06T15-20-34"
+    frame = slice(0, None, 10)
+    video = scale_bool(get_dataset(name, frame=frame, stage="filled")[VIDEO])
+    figure, (expected, actual) = subplots(1, 2)
+    plot_composite_da(video, expected)
+    plot_composite(name, frame, actual)
+    for expected_image, image in zip(expected.images, actual.images, strict=True):
+        assert (image.get_array() == expected_image.get_array()).all()
+    assert actual.get_xlim() == expected.get_xlim()
+    close(figure)
+
+
+def test_append_previews(tmp_path):
+    """Test that previews are appended to a canvas and read back individually."""
+
+    from numpy.random import default_rng  # noqa: PLC0415
+
+    from boilercv.data import VIDEO  # noqa: PLC0415
+    from boilercv.stages.preview import (  # noqa: PLC0415
+        append_previews,
+        read_preview,
+        read_previews,
+        write_previews,
+    )
+
+    rng = default_rng(0)
+    previews = {
+        "a": rng.random((10, 12)) > 0.5,
+        "b": rng.random((7, 5)) > 0.5,
+        "c": rng.random((15, 9)) > 0.5,
+    }
+    path = tmp_path / "previews.nc"
+    write_previews(path, {"a": previews["a"]})
+    append_previews(path, {"b": previews["b"]})
+    with open_dataset(path) as ds:
+        assert ds[VIDEO].shape == (2, 10, 12)
+    assert (read_preview(path, "b") == previews["b"]).all()
+    # Growing the canvas rewrites all previews
+    append_previews(path, {"c": previews["c"]})
+    with open_dataset(path) as ds:
+        assert ds[VIDEO].shape == (3, 15, 12)
+    for name, preview in read_previews(path).items():
+        assert (preview == previews[name]).all()
+
+
+def test_get_all_contours_empty_frame():
+    """Test that a frame without contours doesn't discard contours in other frames."""
+
+    from boilercv.stages.find_contours import get_all_contours  # noqa: PLC0415
+
+    video = zeros((3, 20, 20), dtype=uint8)
+    video[0, 2:5, 2:5] = 255
+    video[2, 2:5, 2:5] = 255
+    video[2, 10:15, 10:15] = 255
+    df = get_all_contours(video, method=CHAIN_APPROX_SIMPLE)
+    assert list(df.index.unique()) == [(0, 0), (2, 0), (2, 1)]
+    assert get_all_contours(video[:0], method=CHAIN_APPROX_SIMPLE).empty
+
+
+def test_find_contours_sharded():
+    """Test that contours found in shards of frames merge into those of the video."""
+
+    from pandas import concat  # noqa: PLC0415
+
+    from boilercv.data.sets import (  # noqa: PLC0415
+        get_scaled_video,
+        map_shards_in_parallel,
+    )
+    from boilercv.stages.find_contours import (  # noqa: PLC0415
+        get_all_contours,
+        get_shard_contours,
+    )
+
+    name = "2022-01-06T15-20-34"
+    expected = get_all_contours(
+        get_scaled_video(name, invert=True), method=CHAIN_APPROX_SIMPLE
+    )
+    shards = list(
+        map_shards_in_parallel(
+            get_shard_contours, {name: 101}, shard_size=30, workers=2
+        )
+    )
+    assert [shard for _, shard, _ in shards] == [
+        slice(0, 30),
+        slice(30, 60),
+        slice(60, 90),
+        slice(90, 101),
+    ]
+    assert concat([df for *_, df in shards]).equals(expected)
+
+
+def get_shard_length(name, shard):
+    """Get the number of frames in a shard."""
+    return shard.stop - shard.start
+
+
+def test_map_shards_in_parallel():
+    """Test that only as many videos as there are workers are processed at once."""
+
+    from boilercv.data.sets import map_shards_in_parallel  # noqa: PLC0415
+
+    num_frames = dict.fromkeys("abcdef", 10)
+    shards = list(
+        map_shards_in_parallel(get_shard_length, num_frames, shard_size=3, workers=2)
+    )
+    assert sum(length for *_, length in shards) == 60
+    started: set[str] = set()
+    for name, shard, _ in shards:
+        started.add(name)
+        if shard.stop == num_frames[name]:
+            assert len(started) <= 2
+            started.remove(name)
+
+
+def write_pid(name, destination):
+    """Write the process ID, waiting for other outputs to be recorded if last."""
+
+    from json import loads  # noqa: PLC0415
+    from os import getpid  # noqa: PLC0415
+    from time import sleep  # noqa: PLC0415
+
+    if name == "d":
+        manifest = destination.parent / "manifest.json"
+        for _ in range(300):
+            if manifest.exists() and set(
+                loads(manifest.read_text(encoding="utf-8"))["outputs"]
+            ) >= {"a", "b", "c"}:
+                break
+            sleep(0.1)
+        else:
+            raise TimeoutError("Finished outputs weren't recorded as they finished.")
+    destination.write_text(str(getpid()))
+
+
+def test_process_in_parallel(tmp_path):
+    """Test that outputs are recorded as workers finish, in as many workers as given."""
+
+    from os import getpid  # noqa: PLC0415
+
+    from boilercv.data.manifest import load_manifest  # noqa: PLC0415
+    from boilercv.data.sets import process_in_parallel  # noqa: PLC0415
+
+    manifest = load_manifest(tmp_path)
+    destinations = {name: tmp_path / name for name in "abcd"}
+    for destination in destinations.values():
+        manifest.is_current(destination, [], {})
+    process_in_parallel(write_pid, destinations, workers=2)
+    assert set(manifest.outputs) == set(destinations)
+    pids = {int(destination.read_text()) for destination in destinations.values()}
+    assert len(pids) <= 2
+    assert getpid() not in pids
+
+
+def test_fill_sharded():
+    """Test that filling shards of frames matches filling the whole video."""
+
+    from numpy import concatenate  # noqa: PLC0415
+
+    from boilercv.data.sets import get_contours_df  # noqa: PLC0415
+    from boilercv.stages.fill import fill_contours, fill_shard  # noqa: PLC0415
+
+    name = "2022-01-06T15-20-34"
+    expected = fill_contours(get_contours_df(name), 101, 800, 600)
+    result = concatenate([
+        fill_shard(name, slice(i, min(i + 30, 101))) for i in range(0, 101, 30)
+    ])
+    assert (result == expected).all()
+
+
+def draw_each_frame(df, num_frames, height, width):
+    """Fill contours as was done before they were filled all at once."""
+
+    from numpy import packbits  # noqa: PLC0415
+
+    from boilercv.images.cv import draw_contours  # noqa: PLC0415
+
+    video = zeros((num_frames, height, width), dtype=uint8)
+    for frame_num in df.index.unique("frame"):
+        contours = list(
+            df.loc[frame_num, :].groupby("contour").apply(lambda grp: grp.values)
+        )
+        video[frame_num] = draw_contours(video[frame_num], contours)
+    return packbits(video, axis=-1)
+
+
+def test_fill_contours_matches_drawing_each_frame():
+    """Test that filling contours matches drawing the contours of each frame in turn."""
+
+    from pandas import DataFrame, MultiIndex  # noqa: PLC0415
+
+    from boilercv.data.sets import get_contours_df  # noqa: PLC0415
+    from boilercv.stages.fill import fill_contours, fill_shard  # noqa: PLC0415
+
+    name = "2022-01-06T15-20-34"
+    expected = draw_each_frame(get_contours_df(name), 101, 800, 600)
+    assert (fill_contours(get_contours_df(name), 101, 800, 600) == expected).all()
+    assert (fill_shard(name, slice(40, 70)) == expected[40:70]).all()
+    # Lopsided triangles in a wide image, in frames with gaps between them
+    df = DataFrame(
+        [(1, 2), (1, 9), (6, 2), (0, 20), (4, 27), (7, 20)],
+        index=MultiIndex.from_tuples(
+            [(0, 0)] * 3 + [(2, 3)] * 3, names=["frame", "contour"]
+        ),
+        columns=["ypx", "xpx"],
+    )
+    expected = draw_each_frame(df, 4, 8, 32)
+    assert expected[[0, 2]].any()
+    assert (fill_contours(df, 4, 8, 32) == expected).all()
+    assert (fill_contours(df.loc[2:], 2, 8, 32, first_frame=2) == expected[2:]).all()
+
+
+def test_manifest(tmp_path):
+    """Test that outputs are reprocessed only when their inputs or parameters change."""
+
+    from os import utime  # noqa: PLC0415
+
+    from boilercv.data.contours import DEFAULT_CONTOUR_STORE  # noqa: PLC0415
+    from boilercv.data.manifest import Manifest  # noqa: PLC0415
+    from boilercv.data.sets import get_unprocessed_destinations  # noqa: PLC0415
+    from boilercv.models.params import PARAMS  # noqa: PLC0415
+    from boilercv.stages import find_contours  # noqa: PLC0415
+
+    source = tmp_path / "source.nc"
+    source.write_text("video")
+    destination = tmp_path / "output" / "output.nc"
+    destination.parent.mkdir()
+    manifest = Manifest(destination.parent)
+    assert not manifest.is_current(destination, [source], {"param": 1})
+    destination.write_text("output")
+    manifest.record(destination)
+    assert Manifest(destination.parent).is_current(destination, [source], {"param": 1})
+    assert not Manifest(destination.parent).is_current(
+        destination, [source], {"param": 2}
+    )
+    utime(source, ns=(0, 0))
+    assert Manifest(destination.parent).is_current(destination, [source], {"param": 1})
+    source.write_text("changed")
+    assert not Manifest(destination.parent).is_current(
+        destination, [source], {"param": 1}
+    )
+    find_contours.main(workers=1)
+    assert not get_unprocessed_destinations(
+        PARAMS.paths.contours,
+        ext=DEFAULT_CONTOUR_STORE.ext,
+        inputs=find_contours.get_inputs,
+        params={"method": find_contours.METHOD},
+    )
+    # Changes to functions that stages compute with reprocess their outputs
+    inputs = find_contours.get_inputs("2022-01-06T15-20-34")
+    assert {"find_contours.py", "cv.py", "packing.py"} <= {path.name for path in inputs}
+
+
+def test_pipeline():
+    """Test that pipelines keep items in order and hold only a few at once."""
+
+    from threading import Lock  # noqa: PLC0415
+
+    from boilercv.data.pipeline import pipeline  # noqa: PLC0415
+
+    lock = Lock()
+    held = most_held = 0
+    written = []
+
+    def read(item: int) -> int:
+        nonlocal held, most_held
+        with lock:
+            held += 1
+            most_held = max(most_held, held)
+        return item
+
+    def write(_item: int, result: int):
+        nonlocal held
+        written.append(result)
+        with lock:
+            held -= 1
+
+    def fail(_item: int, _result: int):
+        raise ValueError
+
+    pipeline(range(20), read, lambda _, data: 2 * data, write, size=1)
+    assert written == [2 * item for item in range(20)]
+    # One item read ahead, one being computed, and one being written
+    assert most_held <= 3
+    with pytest.raises(ValueError):  # noqa: PT011
+        pipeline(range(5), read, lambda _, data: data, fail)
+    with pytest.raises(ValueError):  # noqa: PT011
+        pipeline(range(5), read, fail, write)
+
+
+def test_lazy_video():
+    """Test that lazily-accessed frames match the loaded dataset."""
+
+    from boilercv.data import VIDEO  # noqa: PLC0415
+    from boilercv.data.sets import LazyVideo, get_dataset  # noqa: PLC0415
+
+    name = "2022-01-06T15-20-34"
+    expected = get_dataset(name)[VIDEO].values
+    with LazyVideo(name) as video:
+        assert video.shape == expected.shape
+        assert (video[3] == expected[3]).all()
+        assert (video[10:20] == expected[10:20]).all()
+        for frame, batch in video.iter_batches(batch_size=30):
+            assert (batch == expected[frame]).all()
+
+
+def write_twice(source, destination, mode):
+    """Write a source twice over as its decoded copy."""
+    destination.write_bytes(source.read_bytes() * 2)
+
+
+def test_decode_cache(tmp_path):
+    """Test that decoded copies track their sources and stay within budget."""
+
+    from concurrent.futures import ProcessPoolExecutor  # noqa: PLC0415
+
+    from boilercv.data.cache import DecodeCache, get_sidecar  # noqa: PLC0415
+
+    cache = DecodeCache(mode="uncompressed", max_bytes=10)
+    sources = {key: tmp_path / f"{key}.src" for key in "abc"}
+    for source in sources.values():
+        source.write_bytes(b"123")
+    copies = tmp_path / "copies"
+    copy_a = cache.get(sources["a"], copies / "a", write_twice)
+    assert copy_a.read_bytes() == b"123123"
+    assert get_sidecar(copy_a).exists()
+    sources["a"].write_bytes(b"456")
+    assert cache.get(sources["a"], copies / "a", write_twice).read_bytes() == b"456456"
+    cache.get(sources["b"], copies / "b", write_twice)
+    assert not copy_a.exists()
+    assert not get_sidecar(copy_a).exists()
+    # Workers leave removing copies to the main process
+    with ProcessPoolExecutor(1) as executor:
+        executor.submit(cache.get, sources["c"], copies / "c", write_twice).result()
+    assert (copies / "b").exists()
+    cache.evict(copies)
+    assert not (copies / "b").exists()
+    assert (copies / "c").exists()
+    assert (
+        DecodeCache(mode="off").get(sources["a"], copies / "a", write_twice)
+        == (sources["a"])
+    )
+
+
+@pytest.mark.parametrize("mode", ["uncompressed", "fast", "off"])
+def test_decode_modes(monkeypatch, mode):
+    """Test that videos and contours read the same in each decode mode."""
+
+    from boilercv.data import VIDEO  # noqa: PLC0415
+    from boilercv.data.cache import DECODE_CACHE  # noqa: PLC0415
+    from boilercv.data.sets import (  # noqa: PLC0415
+        LazyVideo,
+        get_contours_df,
+        get_dataset,
+    )
+
+    name = "2022-01-06T15-20-34"
+    expected = get_dataset(name, cache=False)[VIDEO].values
+    expected_contours = get_contours_df(name)
+    monkeypatch.setattr(DECODE_CACHE, "mode", mode)
+    assert (get_dataset(name, cache=False)[VIDEO].values == expected).all()
+    assert get_contours_df(name).equals(expected_contours)
+    with LazyVideo(name) as video:
+        assert (video[:] == expected).all()
+
+
+@pytest.mark.parametrize(
+    "frames", [slice(None), slice(5, 30), slice(None, 30, 10), slice(100, None)]
+)
+def test_parquet_contours(tmp_path, frames):
+    """Test that contours read from Parquet match those read from HDF5."""
+
+    from boilercv.data.contours import ParquetContourStore  # noqa: PLC0415
+    from boilercv.data.sets import get_contours_df  # noqa: PLC0415
+
+    name = "2022-01-06T15-20-34"
+    path = tmp_path / "contours.parquet"
+    store = ParquetContourStore(frames_per_group=10)
+    store.write(get_contours_df(name), path)
+    assert store.read(path, frames).equals(get_contours_df(name, frames))
+
+
+def test_get_objects():
+    """Test that object geometry matches exported objects."""
+
+    from pandas import read_hdf  # noqa: PLC0415
+    from pandas.testing import assert_frame_equal  # noqa: PLC0415
+
+    from boilercv.data.objects import get_objects  # noqa: PLC0415
+    from boilercv.data.sets import get_contours_df  # noqa: PLC0415
+    from boilercv.experiments.e230920_subcool import OBJECTS  # noqa: PLC0415
+
+    name = "2023-09-20T17-14-18"
+    assert_frame_equal(
+        get_objects(get_contours_df(name)),
+        read_hdf(OBJECTS / f"objects_{name}.h5"),  # type: ignore  # pyright 1.1.333
+    )
+
+
+def test_link():
+    """Test that linked tracks match those exported with Trackpy."""
+
+    from pandas import read_hdf  # noqa: PLC0415
+
+    from boilercv.experiments.e230920_subcool import OBJECTS, TRACKS  # noqa: PLC0415
+    from boilercv.tracking import get_motion, link  # noqa: PLC0415
+
+    name = "2023-09-20T17-14-18"
+    objects = read_hdf(OBJECTS / f"objects_{name}.h5")
+    expected = read_hdf(TRACKS / f"tracks_{name}.h5").reindex(objects.index)  # type: ignore  # pyright 1.1.333
+    tracks = get_motion(link(objects, search_range=30, memory=5))  # type: ignore  # pyright 1.1.333
+    assert {frozenset(g) for g in tracks.groupby("particle").groups.values()} == {
+        frozenset(g) for g in expected.groupby("bubble").groups.values()
+    }
+    assert (tracks["frame_lifetime"] == expected["frame_lifetime"]).all()
+
+
+def test_find_overlapping():
+    """Test that the grid index finds the same overlaps as comparing every box."""
+
+    from numpy.random import default_rng  # noqa: PLC0415
+
+    from boilercv.stages.find_unobstructed import find_overlapping  # noqa: PLC0415
+
+    rng = default_rng(0)
+    frame = rng.integers(0, 5, 200)
+    y0, x0 = rng.integers(0, 200, 200), rng.integers(0, 200, 200)
+    y1, x1 = y0 + rng.integers(0, 40, 200), x0 + rng.integers(0, 40, 200)
+    expected = (
+        (frame[:, None] == frame)
+        & (y0[:, None] <= y1)
+        & (y0 <= y1[:, None])
+        & (x0[:, None] <= x1)
+        & (x0 <= x1[:, None])
+    )
+    expected[range(200), range(200)] = False
+    assert (
+        find_overlapping(frame, y0, y1, x0, x1, grid=16) == expected.any(axis=1)
+    ).all()
+
+
+def test_find_unobstructed():
+    """Test that unobstructed bubbles are inside the ROI and don't overlap others."""
+
+    from boilercv.data.sets import get_contours_df, get_roi  # noqa: PLC0415
+    from boilercv.stages.find_unobstructed import find_unobstructed  # noqa: PLC0415
+
+    name = "2022-01-06T15-20-34"
+    contours = get_contours_df(name)
+    roi = get_roi(name)
+    result = find_unobstructed(contours, roi)
+    assert 0 < len(result) < len(contours.index.unique())
+    unobstructed = contours[contours.index.isin(result.index)]
+    assert roi[unobstructed["ypx"], unobstructed["xpx"]].all()
+    boxes = unobstructed.groupby(["frame", "contour"]).agg(["min", "max"])
+    for _, frame_boxes in boxes.groupby("frame"):
+        (y0, y1), (x0, x1) = (
+            frame_boxes[col][["min", "max"]].to_numpy().T for col in ("ypx", "xpx")
+        )
+        overlap = (
+            (y0[:, None] <= y1)
+            & (y0 <= y1[:, None])
+            & (x0[:, None] <= x1)
+            & (x0 <= x1[:, None])
+        )
+        assert overlap.sum() == len(frame_boxes)
+
+
+def test_get_unobstructed():
+    """Test that unobstructed bubbles found by the stage are read back by frame."""
+
+    from boilercv.data.sets import (  # noqa: PLC0415
+        get_contours_df,
+        get_roi,
+        get_unobstructed,
+    )
+    from boilercv.stages import find_unobstructed  # noqa: PLC0415
+
+    name = "2022-01-06T15-20-34"
+    find_unobstructed.main(workers=1)
+    expected = find_unobstructed.find_unobstructed(get_contours_df(name), get_roi(name))
+    assert get_unobstructed(name).index.equals(expected.index)
+    result = get_unobstructed(name, frames=slice(10, 20))
+    assert result.index.equals(expected.loc[10:20].index)
+    assert set(result.index.get_level_values("frame")) == set(range(10, 21))
+
+
+def test_transform_pipeline():
+    """Test that pipelines transform videos in place, in threads, like each frame."""
+
+    from concurrent.futures import ThreadPoolExecutor  # noqa: PLC0415
+
+    from cv2 import MORPH_ELLIPSE, getStructuringElement, morphologyEx  # noqa: PLC0415
+    from numpy.random import default_rng  # noqa: PLC0415
+
+    from boilercv.images import scale_bool, unpad  # noqa: PLC0415
+    from boilercv.images.cv import (  # noqa: PLC0415
+        Op,
+        Transform,
+        TransformPipeline,
+        pad,
+    )
+
+    transforms = [Transform(Op.close, 4), Transform(Op.erode, 9)]
+    video = scale_bool(default_rng(0).random((6, 40, 50)) > 0.8)
+    # Pad by the largest kernel, transform each frame, then unpad
+    expected = video.copy()
+    for frame, img in enumerate(video):
+        img = pad(img, 9, value=0)
+        for transform in transforms:
+            img = morphologyEx(
+                src=img,
+                op=transform.op.value,
+                kernel=getStructuringElement(MORPH_ELLIPSE, [transform.size] * 2),
+            )
+        expected[frame] = unpad(img, 9)
+    pipeline = TransformPipeline(transforms)
+    assert (pipeline.apply(video) == expected).all()
+    # Channels of an image are transformed like separate images
+    channels = video[:3].transpose(1, 2, 0).copy()
+    assert (pipeline(channels) == expected[:3].transpose(1, 2, 0)).all()
+    with ThreadPoolExecutor(2) as executor:
+        assert (pipeline.apply(video, video, executor) == expected).all()
+    assert (video == expected).all()
+
+
+def test_compare_theory():
+    """Test that correlations evaluated over all tracks match evaluating one sample."""
+
+    from pandas import DataFrame  # noqa: PLC0415
+
+    from boilercv.correlations import (  # noqa: PLC0415
+        dimensionless_bubble_diameter_florschuetz,
+    )
+    from boilercv.stages.compare_theory import (  # noqa: PLC0415
+        compare_theory,
+        get_correlations,
+    )
+
+    tracks = DataFrame({
+        "trial": ["b", "b", "a", "a", "a"],
+        "bubble": [0, 0, 0, 0, 1],
+        "frame": [1, 0, 0, 1, 1],
+        "time": [0.01, 0.0, 0.0, 0.01, 0.01],
+        "diameter": [0.9e-3, 1e-3, 2e-3, 1.8e-3, 1e-3],
+        "dy": [0.1, 0.0, 0.0, 0.2, 0.0],
+        "dx": [0.0, 0.0, 0.0, 0.0, 0.0],
+        "subcooling": [2.0, 2.0, 5.0, 5.0, 5.0],
+    })
+    result = compare_theory(tracks)
+    assert list(result["trial"]) == ["a", "a", "a", "b", "b"]
+    assert list(result["time"]) == [0.0, 0.01, 0.0, 0.0, 0.01]
+    assert list(result["dimensionless_bubble_diameter"]) == pytest.approx([
+        1.0,
+        0.9,
+        1.0,
+        1.0,
+        0.9,
+    ])
+    assert set(get_correlations()) <= set(result.columns)
+    sample = result.iloc[1]
+    assert sample["florschuetz"] == dimensionless_bubble_diameter_florschuetz(
+        jakob=sample["bubble_jakob"], fourier=sample["bubble_fourier"]
+    )
+
+
+def test_compare_theory_tracks():
+    """Test comparing real tracks with theory, at the subcooling of their trial."""
+
+    from numpy import isfinite  # noqa: PLC0415
+
+    from boilercv.experiments.e230920_subcool import (  # noqa: PLC0415
+        THERMAL_DATA,
+        TRACKS,
+    )
+    from boilercv.stages.compare_theory import (  # noqa: PLC0415
+        SUBCOOLING,
+        compare_theory,
+        get_tracks,
+    )
+
+    tracks = get_tracks(TRACKS, THERMAL_DATA)
+    result = compare_theory(tracks)
+    assert len(result) == len(tracks)
+    assert result[SUBCOOLING].to_numpy() == pytest.approx(1.03, abs=0.01)
+    assert isfinite(result["florschuetz"]).any()
+    with pytest.raises(ValueError, match="subcooling"):
+        compare_theory(tracks.assign(**{SUBCOOLING: 60.0}))
+
+
+def test_compare_theory_stage():
+    """Test that the stage compares tracks with theory, and fails without tracks."""
+
+    from pathlib import Path  # noqa: PLC0415
+    from shutil import copy  # noqa: PLC0415
+
+    from pandas import read_parquet  # noqa: PLC0415
+
+    from boilercv.experiments.e230920_subcool import TRACKS  # noqa: PLC0415
+    from boilercv.models.params import PARAMS  # noqa: PLC0415
+    from boilercv.stages import compare_theory  # noqa: PLC0415
+
+    with pytest.raises(FileNotFoundError, match="No track tables"):
+        compare_theory.main()
+    tracks = Path(copy(next(TRACKS.glob("*.h5")), PARAMS.paths.tracks))
+    try:
+        compare_theory.main()
+    finally:
+        tracks.unlink()
+    result = read_parquet(PARAMS.paths.lifetimes / "theory.parquet")
+    assert set(compare_theory.get_correlations()) <= set(result.columns)
+    assert len(result)
+
+
+def test_instrument():
+    """Test that measurements are totaled by name and video, and reported by stages."""
+
+    from subprocess import run  # noqa: PLC0415
+    from sys import executable  # noqa: PLC0415
+
+    from pandas import read_json  # noqa: PLC0415
+
+    from boilercv.instrument import (  # noqa: PLC0415
+        get_name,
+        get_report,
+        instrument,
+        measure,
+        pop_measurements,
+    )
+    from boilercv.models.params import PARAMS  # noqa: PLC0415
+    from boilercv.stages import find_tracks  # noqa: PLC0415
+
+    @instrument
+    def double(value: int) -> int:
+        return 2 * value
+
+    pop_measurements()
+    with measure("stage"):
+        for video in ["a", "b"]:
+            with measure("video", video):
+                for value in range(3):
+                    double(value)
+    report = get_report().set_index(["name", "video"])
+    assert report.loc[("stage", ""), "calls"] == 1
+    assert report.loc[("video", "a"), "calls"] == 1
+    assert report.loc[(get_name(double), "a"), "calls"] == 3
+    assert report.loc[(get_name(double), "b"), "calls"] == 3
+    # Growth of the peak memory of a fresh process allocating 256 MB
+    code = "\n".join([
+        "from numpy import ones",
+        "from boilercv.instrument import get_report, measure",
+        "with measure('allocate'):",
+        "    ones(2**28, dtype='uint8')",
+        "assert get_report()['peak_rss_growth_mb'][0] > 200",
+    ])
+    run([executable, "-c", code], check=True)  # noqa: S603
+    find_tracks.main()
+    assert read_json(PARAMS.paths.instrumentation / "find_tracks.json")[
+        "name"
+    ].to_list() == ["find_tracks"]
+
+
+def test_lazy_imports():
+    """Test that slow imports are deferred until they're needed."""
+
+    from subprocess import run  # noqa: PLC0415
+    from sys import executable  # noqa: PLC0415
+
+    import boilercv  # noqa: PLC0415
+
+    code = "\n".join([
+        "import sys",
+        "import boilercv",
+        "assert not {'cv2', 'pandas'} & set(sys.modules)",
+        *[f"import {stage}" for stage in PIPELINE_STAGES],
+        "assert not {'matplotlib', 'PySide6', 'pyqtgraph'} & set(sys.modules)",
+        "import pandas",
+        "assert pandas.get_option('mode.copy_on_write')",
+    ])
+    run([executable, "-c", code], check=True, cwd=boilercv.PROJECT_PATH)  # noqa: S603
+
+
+@pytest.mark.parametrize("encoding", ["zlib", "zstd", "blosc", "bitshuffle"])
+def test_encodings(tmp_path, encoding):
+    """Test that videos round-trip through encodings, chunked along frames."""
+
+    from boilercv.data import VIDEO  # noqa: PLC0415
+    from boilercv.data.encodings import ENCODINGS  # noqa: PLC0415
+    from boilercv.data.sets import get_stage, save_dataset  # noqa: PLC0415
+
+    source, _ = get_stage("2022-01-06T15-20-34")
+    path = tmp_path / "encoded.nc"
+    with open_dataset(source) as ds:
+        save_dataset(ds, path, ENCODINGS[encoding])
+        with open_dataset(path) as encoded:
+            assert (encoded[VIDEO].values == ds[VIDEO].values).all()
+            assert encoded[VIDEO].encoding["chunksizes"][0] == (
+                ENCODINGS[encoding].chunk_frames
+            )
+
+
+def test_get_dataset_cache(monkeypatch):
+    """Test that videos are writable unless the cache of unpacked frames is used."""
+
+    from boilercv.data import VIDEO, sets  # noqa: PLC0415
+    from boilercv.data.cache import FrameCache  # noqa: PLC0415
+
+    name = "2022-01-06T15-20-34"
+    assert sets.get_dataset(name, num_frames=2)[VIDEO].values.flags.writeable
+    monkeypatch.setattr(sets, "FRAME_CACHE", FrameCache(max_bytes=2**30))
+    cached = sets.get_dataset(name, num_frames=2, cache=True)[VIDEO]
+    assert not cached.values.flags.writeable
+    again = sets.get_dataset(name, num_frames=2, cache=True)[VIDEO]
+    assert again.values is cached.values
+
+
+def test_frame_cache(tmp_path):
+    """Test least-recently-used eviction and spilling of cached frames."""
+
+    from boilercv.data.cache import FrameCache  # noqa: PLC0415
+
+    cache = FrameCache(max_bytes=200, spill=tmp_path, max_spill_bytes=100)
+    blocks = {key: zeros(100, dtype=uint8) + i for i, key in enumerate("abc")}
+    cache.put(("a",), blocks["a"])
+    cache.put(("b",), blocks["b"])
+    assert cache.get(("a",)) is blocks["a"]
+    cache.put(("c",), blocks["c"])
+    assert cache.nbytes == 200
+    assert (cache.get(("b",)) == blocks["b"]).all()
+    assert cache.get(("c",)) is blocks["c"]
+    cache.put(("d",), zeros(200, dtype=uint8))
+    assert cache.get(("a",)) is None
+    assert cache.nbytes == 200
+
+
+def test_frame_cache_spill_across_processes(tmp_path):
+    """Test that blocks spilled by one process are found by the next."""
+
+    from os import environ  # noqa: PLC0415
+    from subprocess import run  # noqa: PLC0415
+    from sys import executable  # noqa: PLC0415
+
+    from boilercv.data.cache import FrameCache  # noqa: PLC0415
+
+    # Blocks held in memory by the process-wide cache are spilled on exit
+    code = "\n".join([
+        "from numpy import arange",
+        "from boilercv.data.cache import FRAME_CACHE",
+        "FRAME_CACHE.put(('a',), arange(100))",
+    ])
+    run(
+        [executable, "-c", code],  # noqa: S603
+        check=True,
+        env={**environ, "BOILERCV_CACHE_SPILL": str(tmp_path)},
+    )
+    cache = FrameCache(max_bytes=2**20, spill=tmp_path)
+    assert ("a",) in cache
+    assert cache.spill_nbytes > 0
+    assert (cache.get(("a",)) == arange(100)).all()
+    assert cache.spill_nbytes == 0
+    assert cache.nbytes == 800
+
+
+@pytest.fixture()
+def cine(monkeypatch):
+    """Read fake CINEs, as `boilercine` may not be installed.
+
+    Returns a namespace holding the frames of every CINE, and the number of frames in
+    their headers, which may be set to more than there are to fake a truncated CINE.
+    """
+
+    from dataclasses import dataclass  # noqa: PLC0415
+    from importlib import import_module  # noqa: PLC0415
+    from sys import modules  # noqa: PLC0415
+    from types import ModuleType, SimpleNamespace  # noqa: PLC0415
+
+    from numpy import datetime64, timedelta64  # noqa: PLC0415
+
+    @dataclass
+    class Header:
+        framerate: int = 1000
+
+    frames = arange(10 * 4 * 6, dtype=uint8).reshape(10, 4, 6)
+    fake = SimpleNamespace(frames=frames, num_frames=len(frames))
+
+    def get_cine_attributes(_source, _timezone, num_frames=None, start_frame=0):
+        stop = fake.num_frames if num_frames is None else start_frame + num_frames
+        return Header(), datetime64("2024-01-01T00:00:00", "ns") + timedelta64(
+            1, "ms"
+        ) * arange(start_frame, stop)
+
+    def get_cine_images(_source, num_frames=None, start_frame=0):
+        stop = None if num_frames is None else start_frame + num_frames
+        yield from fake.frames[start_frame:stop]
+
+    boilercine = ModuleType("boilercine")
+    boilercine.get_cine_attributes = get_cine_attributes  # type: ignore
+    boilercine.get_cine_images = get_cine_images  # type: ignore
+    monkeypatch.setitem(modules, "boilercine", boilercine)
+    # Import modules reading CINEs anew with the fake, restoring them afterwards
+    for name in ("boilercv.data.video", "boilercv.manual.convert"):
+        monkeypatch.setitem(modules, name, None)
+        del modules[name]
+        import_module(name)
+    return fake
+
+
+def test_prepare_dataset_placeholder(cine, tmp_path):
+    """Test that placeholder videos repeat the first image without copying it."""
+
+    from boilercv.data import TIME, VIDEO  # noqa: PLC0415
+    from boilercv.data.video import prepare_dataset  # noqa: PLC0415
+
+    ds = prepare_dataset(tmp_path / "source.cine", read_images=False)
+    video = ds[VIDEO].values
+    assert video.shape == cine.frames.shape
+    assert (video == cine.frames[0]).all()
+    assert not video.flags.writeable
+    assert video.strides[0] == 0
+    assert ds[TIME].values[-1] == pytest.approx(9e-3)
+
+
+def test_convert_cine(cine, tmp_path):
+    """Test that CINEs converted in chunks match ones written all at once."""
+
+    from xarray import open_dataset  # noqa: PLC0415
+
+    from boilercv.data import HEADER, TIME, VIDEO  # noqa: PLC0415
+    from boilercv.data.video import convert_cine, prepare_dataset  # noqa: PLC0415
+
+    source = tmp_path / "source.cine"
+    prepare_dataset(source).to_netcdf(whole := tmp_path / "whole.nc")
+    convert_cine(source, chunked := tmp_path / "chunked.nc", chunk_size=3)
+    with open_dataset(whole) as expected, open_dataset(chunked) as actual:
+        assert (actual[VIDEO].values == cine.frames).all()
+        assert (actual[VIDEO].values == expected[VIDEO].values).all()
+        assert (actual[TIME].values == expected[TIME].values).all()
+        assert actual[HEADER].attrs == expected[HEADER].attrs
+    cine.num_frames = len(cine.frames) + 1
+    with pytest.raises(ValueError, match="Read 10 of 11 frames"):
+        convert_cine(source, truncated := tmp_path / "truncated.nc", chunk_size=3)
+    assert not truncated.exists()
+
+
+def test_convert(cine):
+    """Test that CINEs are converted to datasets named by their timestamps."""
+
+    from xarray import open_dataset  # noqa: PLC0415
+
+    from boilercv.data import VIDEO  # noqa: PLC0415
+    from boilercv.manual import convert  # noqa: PLC0415
+    from boilercv.models.params import PARAMS  # noqa: PLC0415
+
+    source = PARAMS.paths.cines / "Y20240101H000000.cine"
+    destination = PARAMS.paths.large_sources / "2024-01-01T00-00-00.nc"
+    source.touch()
+    try:
+        convert.main(workers=1)
+        with open_dataset(destination) as ds:
+            assert (ds[VIDEO].values == cine.frames).all()
+    finally:
+        source.unlink()
+        destination.unlink(missing_ok=True)